@@ -1,163 +1,598 @@
 from cosmos_db_utils import enhanced_cosmos_db
-from datetime import datetime, timedelta
+from azure.cosmos import exceptions
+from datetime import datetime, timedelta, timezone
+import uuid
 import json
-from collections import defaultdict
+import time
+import logging
+import queue
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict, Counter
+from heapq import nlargest
+from itertools import groupby
+from operator import itemgetter
+
+logger = logging.getLogger("swiftcheck.analytics")
+
+# Repeated failures of the same kind are logged once per this many occurrences
+ERROR_LOG_SAMPLE_RATE = 100
+
+# Attempts for a batch throttled with 429 before falling back to single writes
+BATCH_THROTTLE_RETRIES = 3
+
+# Cosmos accepts at most 10 operations per patch request
+MAX_PATCH_OPERATIONS = 10
+
+# Per-tenant marker document in analytics_daily holding the ts rollups started counting from
+ROLLUP_START_ID = "rollups_since"
+
+# How long flush() waits for the flusher to write the events it is holding
+FLUSH_WAIT_SECONDS = 10
+
+# Query text is kept constant so the gateway's query-plan cache sees identical strings
+ROLLUP_QUERY = """
+    SELECT c.date, c.counts, c.hourly, c.products FROM c 
+    WHERE c.tenant_id = @tenant_id 
+    AND c.date >= @start_date
+"""
+
+# Events written before the switch to epoch ts carry date/hour/timestamp fields
+# instead; every raw-event query reads those until the old events age out
+EVENT_DATE_EXPR = "(IS_DEFINED(c.ts) ? LEFT(TimestampToDateTime(c.ts * 1000), 10) : c.date)"
+EVENT_HOUR_EXPR = """(IS_DEFINED(c.ts) ? DateTimePart("hh", TimestampToDateTime(c.ts * 1000)) : c.hour)"""
+EVENT_RANGE_FILTER = "(IS_DEFINED(c.ts) ? (c.ts >= @start_ts AND c.ts < @end_ts) : c.date >= @start_date)"
+
+# Upper bound for raw-event queries that run to the present (largest integer a Cosmos number holds exactly)
+OPEN_ENDED_TS = 2 ** 53
+
+# Count events per (type, UTC date, UTC hour) instead of shipping every event;
+# date and hour are derived from the epoch ts at read time
+EVENT_COUNT_QUERY = f"""
+    SELECT c.event_type,
+        {EVENT_DATE_EXPR} AS date,
+        {EVENT_HOUR_EXPR} AS hour,
+        COUNT(1) AS count
+    FROM c 
+    WHERE c.tenant_id = @tenant_id 
+    AND {EVENT_RANGE_FILTER}
+    GROUP BY c.event_type,
+        {EVENT_DATE_EXPR},
+        {EVENT_HOUR_EXPR}
+"""
+
+# Product counts for created templates
+PRODUCT_COUNT_QUERY = f"""
+    SELECT c.event_data.product_name, COUNT(1) AS count
+    FROM c 
+    WHERE c.tenant_id = @tenant_id 
+    AND {EVENT_RANGE_FILTER}
+    AND c.event_type = "template_created"
+    GROUP BY c.event_data.product_name
+"""
+
+# Response-time statistics are aggregated server-side; AVG/MIN/MAX skip events without response_time
+PERFORMANCE_QUERY = """
+    SELECT COUNT(1) AS total_requests,
+        AVG(c.event_data.response_time) AS avg_response_time,
+        MAX(c.event_data.response_time) AS max_response_time,
+        MIN(c.event_data.response_time) AS min_response_time
+    FROM c 
+    WHERE c.tenant_id = @tenant_id 
+    AND c.event_type = @event_type
+    AND (IS_DEFINED(c.ts) ? c.ts >= @start_ts : c.timestamp >= @start_time)
+"""
+
+# Dashboard metric reported for each counted event type
+EVENT_TYPE_METRICS = {
+    "template_created": "templates_created",
+    "template_approved": "templates_approved",
+    "file_processed": "files_processed",
+    "api_call": "api_calls"
+}
+
+def query_parameters(**values):
+    """Build a Cosmos parameter list from keyword arguments"""
+    return [{"name": f"@{name}", "value": value} for name, value in values.items()]
+
+def _patch_path_segment(key):
+    """Escape a property name for use in a JSON patch path"""
+    return str(key).replace("~", "~0").replace("/", "~1")
 
 class AnalyticsEngine:
-    def __init__(self):
+    def __init__(self, batch_size=100, flush_interval=1.0, cache_ttl=60, cache_size=1024):
         self.analytics_container = enhanced_cosmos_db.database.get_container_client("analytics_events")
+        # One pre-aggregated document per (tenant_id, date), id = date
+        self.rollup_container = enhanced_cosmos_db.database.get_container_client("analytics_daily")
+        
+        # Events are buffered and written in per-tenant batches by a background thread
+        self.batch_size = batch_size  # Cosmos transactional batch limit is 100 operations
+        self.flush_interval = flush_interval
+        self._buffer = queue.Queue()
+        self._flush_lock = threading.Lock()
+        
+        # Short-lived cache of dashboard results keyed by (tenant_id, ...)
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._result_cache = {}
+        self._cache_lock = threading.Lock()
+        
+        # Failure counts by kind, exposed through get_error_counts()
+        self.error_counts = Counter()
+        self._error_lock = threading.Lock()
+        
+        # Tenants whose rollup start marker is known to exist
+        self._rollup_started = set()
+        
+        # Partition key path per container id, read once; containers created before
+        # tenant partitioning are keyed on /id
+        self._partition_paths = {}
+        
+        # Leaf Cosmos queries that can overlap with work on the calling thread
+        self._query_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="analytics-query")
+        
+        self.flush_thread = threading.Thread(target=self._flusher, daemon=True)
+        self.flush_thread.start()
+        atexit.register(self.flush)
     
     def track_event(self, tenant_id, event_type, event_data, user_id=None):
         """Track analytics event"""
+        ts = int(time.time())
+        
+        # Date and hour are derived from ts when aggregating, not per write
         event_doc = {
-            "id": f"{tenant_id}_{datetime.now().timestamp()}",
+            "id": f"{tenant_id}_{ts}_{uuid.uuid4().hex[:8]}",
             "tenant_id": tenant_id,
             "event_type": event_type,
             "event_data": event_data,
             "user_id": user_id,
-            "timestamp": datetime.now().isoformat(),
-            "date": datetime.now().strftime("%Y-%m-%d"),
-            "hour": datetime.now().hour
+            "ts": ts  # Epoch seconds
         }
         
+        self._buffer.put(event_doc)
+    
+    def _record_error(self, kind, message, *args):
+        """Count a failure and log a sample of repeated ones"""
+        with self._error_lock:
+            self.error_counts[kind] += 1
+            occurrences = self.error_counts[kind]
+        
+        if occurrences == 1 or occurrences % ERROR_LOG_SAMPLE_RATE == 0:
+            logger.warning(message + " (occurrence %d)", *args, occurrences, exc_info=True)
+    
+    def get_error_counts(self):
+        """Get failure counts by kind"""
+        with self._error_lock:
+            return dict(self.error_counts)
+    
+    def _get_cached(self, key):
+        """Return a cached result if it has not expired"""
+        with self._cache_lock:
+            entry = self._result_cache.get(key)
+            if entry is None:
+                return None
+            
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._result_cache[key]
+                return None
+            return value
+    
+    def _set_cached(self, key, value):
+        """Cache a result for cache_ttl seconds"""
+        with self._cache_lock:
+            if key not in self._result_cache and len(self._result_cache) >= self.cache_size:
+                # Evict the oldest entry (dicts keep insertion order)
+                del self._result_cache[next(iter(self._result_cache))]
+            self._result_cache[key] = (time.monotonic() + self.cache_ttl, value)
+    
+    def invalidate(self, *tenant_ids):
+        """Drop cached dashboard results for the given tenants"""
+        with self._cache_lock:
+            for key in [k for k in self._result_cache if k[0] in tenant_ids]:
+                del self._result_cache[key]
+    
+    def _partitioned_by_tenant(self, container):
+        """Check whether a container is partitioned on /tenant_id"""
+        if container.id not in self._partition_paths:
+            try:
+                self._partition_paths[container.id] = container.read()["partitionKey"]["paths"][0]
+            except exceptions.CosmosResourceNotFoundError:
+                raise
+            except Exception:
+                # Unknown layout: cross-partition queries are correct either way, so retry the read next time
+                self._record_error("partition_key_read", "Could not read partition key of %s", container.id)
+                return False
+        return self._partition_paths[container.id] == "/tenant_id"
+    
+    def _tenant_scope(self, container, tenant_id):
+        """Query options that confine a tenant-filtered query to the tenant's partition when possible"""
+        if self._partitioned_by_tenant(container):
+            return {"partition_key": tenant_id}
+        # Partitioned on /id: the c.tenant_id filter has to fan out across partitions
+        return {"enable_cross_partition_query": True}
+    
+    def _flusher(self):
+        """Background loop that writes buffered events"""
+        while True:
+            pending = []
+            flush_requests = []
+            try:
+                # Block until at least one item arrives, then drain up to a batch; a queued
+                # threading.Event is a flush() request to write what is held right away
+                item = self._buffer.get()
+                # The interval runs from the first pending event, so a slow trickle still flushes on time
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if isinstance(item, threading.Event):
+                        flush_requests.append(item)
+                        break
+                    pending.append(item)
+                    if len(pending) >= self.batch_size:
+                        break
+                    try:
+                        item = self._buffer.get(timeout=max(0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                
+                if pending:
+                    with self._flush_lock:
+                        self._write_events(pending)
+                
+            except Exception:
+                self._record_error("flusher", "Analytics flusher error")
+            finally:
+                for flush_request in flush_requests:
+                    flush_request.set()
+    
+    def _drain_buffer(self):
+        """Take every event currently queued without blocking, answering any flush requests"""
+        pending = []
+        while True:
+            try:
+                item = self._buffer.get_nowait()
+            except queue.Empty:
+                return pending
+            
+            if isinstance(item, threading.Event):
+                item.set()
+            else:
+                pending.append(item)
+    
+    def flush(self):
+        """Write all buffered events immediately, including those the flusher is holding"""
+        # Queued behind every event tracked so far, so once the flusher answers it has
+        # written whatever it had already taken off the queue
+        flushed = threading.Event()
+        self._buffer.put(flushed)
+        if self.flush_thread.is_alive():
+            flushed.wait(FLUSH_WAIT_SECONDS)
+        
+        with self._flush_lock:
+            pending = self._drain_buffer()
+            if pending:
+                self._write_events(pending)
+    
+    def _write_events(self, events):
+        """Write events grouped by tenant as transactional batches"""
+        # Sort so each batch targets a single partition key value
+        events.sort(key=itemgetter("tenant_id"))
+        tenant_ids = set()
+        # Only events that reached the container are rolled up, so rollups match the raw events
+        stored = []
+        
+        for tenant_id, group in groupby(events, key=itemgetter("tenant_id")):
+            tenant_ids.add(tenant_id)
+            tenant_events = list(group)
+            if not self._partitioned_by_tenant(self.analytics_container):
+                # A batch must share one partition key value, which /id-partitioned events never do
+                stored.extend(self._write_individually(tenant_events))
+                continue
+            
+            for start in range(0, len(tenant_events), self.batch_size):
+                chunk = tenant_events[start:start + self.batch_size]
+                try:
+                    # Batches are all-or-nothing, so a successful one stored the whole chunk
+                    self._execute_batch(tenant_id, chunk)
+                    stored.extend(chunk)
+                except Exception:
+                    # Fall back to individual writes
+                    self._record_error("batch_write", "Analytics batch write failed, writing individually")
+                    stored.extend(self._write_individually(chunk))
+        
+        self._update_rollups(stored)
+        
+        # Only now can a dashboard read see these events, so earlier reads stay cached until here
+        self.invalidate(*tenant_ids)
+    
+    def _write_individually(self, events):
+        """Write events one at a time and return the ones that were stored"""
+        stored = []
+        for event_doc in events:
+            try:
+                self.analytics_container.create_item(event_doc)
+                stored.append(event_doc)
+            except Exception:
+                self._record_error("event_write", "Analytics tracking failed")
+        return stored
+    
+    def _execute_batch(self, tenant_id, chunk):
+        """Write one partition's batch, backing off while it is throttled"""
+        operations = [("create", (event_doc,)) for event_doc in chunk]
+        for attempt in range(BATCH_THROTTLE_RETRIES):
+            try:
+                return self.analytics_container.execute_item_batch(
+                    batch_operations=operations,
+                    partition_key=tenant_id
+                )
+            except exceptions.CosmosHttpResponseError as e:
+                if e.status_code != 429 or attempt == BATCH_THROTTLE_RETRIES - 1:
+                    raise
+                time.sleep(0.1 * 2 ** attempt)
+    
+    def _update_rollups(self, events):
+        """Add events to the daily rollup documents"""
+        increments = defaultdict(Counter)
+        first_ts = {}
+        for event_doc in events:
+            tenant_id = event_doc["tenant_id"]
+            first_ts[tenant_id] = min(event_doc["ts"], first_ts.get(tenant_id, event_doc["ts"]))
+            event_time = datetime.fromtimestamp(event_doc["ts"], timezone.utc)
+            paths = increments[(event_doc["tenant_id"], event_time.strftime("%Y-%m-%d"))]
+            paths[f"/counts/{_patch_path_segment(event_doc['event_type'])}"] += 1
+            paths[f"/hourly/{event_time.hour}"] += 1
+            
+            if event_doc["event_type"] == "template_created":
+                product = (event_doc.get("event_data") or {}).get("product_name", "Unknown")
+                paths[f"/products/{_patch_path_segment(product)}"] += 1
+        
+        # The marker goes in before any increments, so it never postdates a rolled-up event
+        for tenant_id, ts in first_ts.items():
+            self._mark_rollup_start(tenant_id, ts)
+        
+        for (tenant_id, date), paths in increments.items():
+            operations = [{"op": "incr", "path": path, "value": count} for path, count in paths.items()]
+            try:
+                for start in range(0, len(operations), MAX_PATCH_OPERATIONS):
+                    self._patch_rollup(tenant_id, date, operations[start:start + MAX_PATCH_OPERATIONS])
+            except Exception:
+                self._record_error("rollup_update", "Analytics rollup update failed for %s on %s", tenant_id, date)
+    
+    def _mark_rollup_start(self, tenant_id, ts):
+        """Record when rollups began counting a tenant's events, once per tenant"""
+        if tenant_id in self._rollup_started:
+            return
+        
         try:
-            self.analytics_container.create_item(event_doc)
-        except Exception as e:
-            print(f"⚠️ Analytics tracking failed: {e}")
+            self.rollup_container.create_item({"id": ROLLUP_START_ID, "tenant_id": tenant_id, "ts": ts})
+        except exceptions.CosmosResourceExistsError:
+            pass  # Recorded earlier, possibly by another process
+        except Exception:
+            # Without a marker the dashboard reads raw events, so a later (larger) ts is still safe
+            self._record_error("rollup_start", "Could not record rollup start for %s", tenant_id)
+            return
+        self._rollup_started.add(tenant_id)
+    
+    def _get_rollup_start_date(self, tenant_id):
+        """Get the UTC date rollups started on for a tenant, or None if they have not"""
+        try:
+            marker = self.rollup_container.read_item(item=ROLLUP_START_ID, partition_key=tenant_id)
+        except exceptions.CosmosResourceNotFoundError:
+            # No marker yet, or analytics_daily not provisioned
+            return None
+        return datetime.fromtimestamp(marker["ts"], timezone.utc).strftime("%Y-%m-%d")
+    
+    def _patch_rollup(self, tenant_id, date, operations):
+        """Apply increments to a rollup document, creating it on first use"""
+        try:
+            self.rollup_container.patch_item(item=date, partition_key=tenant_id, patch_operations=operations)
+        except exceptions.CosmosResourceNotFoundError:
+            try:
+                self.rollup_container.create_item({
+                    "id": date,
+                    "tenant_id": tenant_id,
+                    "date": date,
+                    "counts": {},
+                    "hourly": {},
+                    "products": {}
+                })
+            except exceptions.CosmosResourceExistsError:
+                pass  # Another writer created it first
+            
+            self.rollup_container.patch_item(item=date, partition_key=tenant_id, patch_operations=operations)
     
     def get_dashboard_data(self, tenant_id, days=30):
         """Get dashboard analytics data"""
-        start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        cache_key = (tenant_id, days)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
         
+        # Rollup dates are UTC days
+        start = datetime.now(timezone.utc) - timedelta(days=days)
+        start_date = start.strftime("%Y-%m-%d")
+        parameters = query_parameters(tenant_id=tenant_id, start_date=start_date)
+        
+        # Queries are scoped to the tenant's partition where the container is
+        # partitioned by tenant, so they run as single-partition queries
         try:
-            # Get events for date range
-            query = """
-                SELECT * FROM c 
-                WHERE c.tenant_id = @tenant_id 
-                AND c.date >= @start_date
-                ORDER BY c.timestamp DESC
-            """
-            
-            events = list(self.analytics_container.query_items(
-                query=query,
-                parameters=[
-                    {"name": "@tenant_id", "value": tenant_id},
-                    {"name": "@start_date", "value": start_date}
-                ]
-            ))
+            # Rollups only count events tracked since the tenant's start marker; without one,
+            # everything comes from the raw events
+            rollup_start_date = self._get_rollup_start_date(tenant_id)
+            rollups = []
+            if rollup_start_date is not None:
+                # At most one small document per day instead of every raw event
+                rollups = self.rollup_container.query_items(
+                    query=ROLLUP_QUERY,
+                    parameters=parameters,
+                    max_item_count=1000,
+                    **self._tenant_scope(self.rollup_container, tenant_id)
+                )
             
-            # Process analytics
-            analytics = self.process_events(events)
+            if rollup_start_date is not None and rollup_start_date < start_date:
+                counters = self.process_rollups(rollups)
+            else:
+                # Days up to and including the start day (only partly rolled up) come from raw events
+                if rollup_start_date is None:
+                    raw_end_ts = OPEN_ENDED_TS
+                else:
+                    first_day = datetime.strptime(rollup_start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+                    raw_end_ts = int((first_day + timedelta(days=1)).timestamp())
+                
+                start_ts = int(start.replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
+                counters = self.process_rollups(
+                    rollup for rollup in rollups if rollup["date"] > rollup_start_date
+                )
+                raw_counters = self.aggregate_raw_events(tenant_id, start_date, start_ts, raw_end_ts)
+                for total, raw in zip(counters, raw_counters):
+                    total.update(raw)
             
-            return {
+            dashboard = {
                 "tenant_id": tenant_id,
                 "period_days": days,
-                "total_events": len(events),
-                **analytics
+                **self.build_metrics(*counters)
             }
+            self._set_cached(cache_key, dashboard)
+            
+            return dashboard
             
         except Exception as e:
-            print(f"❌ Error getting dashboard data: {e}")
+            self._record_error("dashboard_query", "Error getting dashboard data")
             return {"error": str(e)}
     
-    def process_events(self, events):
-        """Process events into analytics metrics"""
-        metrics = {
-            "templates_created": 0,
-            "templates_approved": 0,
-            "files_processed": 0,
-            "api_calls": 0,
-            "daily_activity": defaultdict(int),
-            "hourly_distribution": defaultdict(int),
-            "top_products": defaultdict(int),
-            "approval_times": [],
-            "error_rate": 0
-        }
+    def aggregate_raw_events(self, tenant_id, start_date, start_ts, end_ts=OPEN_ENDED_TS):
+        """Aggregate raw events in [start_ts, end_ts) with GROUP BY queries"""
+        parameters = query_parameters(tenant_id=tenant_id, start_date=start_date, start_ts=start_ts, end_ts=end_ts)
+        scope = self._tenant_scope(self.analytics_container, tenant_id)
         
-        total_events = len(events)
-        error_count = 0
+        count_rows = self.analytics_container.query_items(
+            query=EVENT_COUNT_QUERY,
+            parameters=parameters,
+            max_item_count=1000,
+            **scope
+        )
         
-        for event in events:
-            event_type = event["event_type"]
-            event_data = event.get("event_data", {})
-            date = event["date"]
-            hour = event["hour"]
-            
-            # Count by type
-            if event_type == "template_created":
-                metrics["templates_created"] += 1
-                product = event_data.get("product_name", "Unknown")
-                metrics["top_products"][product] += 1
-                
-            elif event_type == "template_approved":
-                metrics["templates_approved"] += 1
-                
-            elif event_type == "file_processed":
-                metrics["files_processed"] += 1
-                
-            elif event_type == "api_call":
-                metrics["api_calls"] += 1
-                
-            elif event_type == "error":
-                error_count += 1
+        # Fetch product counts on the pool while this thread streams the count rows
+        product_rows = self._query_pool.submit(lambda: list(self.analytics_container.query_items(
+            query=PRODUCT_COUNT_QUERY,
+            parameters=parameters,
+            max_item_count=1000,
+            **scope
+        )))
+        
+        # Rows are consumed page by page as they arrive
+        return self.process_events(count_rows, self._iter_future(product_rows))
+    
+    def _iter_future(self, future):
+        """Yield the rows of a pooled query once it completes"""
+        yield from future.result()
+    
+    def process_rollups(self, rollups):
+        """Sum daily rollup documents into metric counters"""
+        type_counts = Counter()
+        daily_activity = Counter()
+        hourly_distribution = Counter()
+        top_products = Counter()
+        
+        for rollup in rollups:
+            counts = rollup.get("counts", {})
+            type_counts.update(counts)
+            daily_activity[rollup["date"]] += sum(counts.values())
+            hourly_distribution.update(rollup.get("hourly", {}))
+            top_products.update(rollup.get("products", {}))
+        
+        # Hours are stored as property names; report them as ints like the raw events
+        hourly_distribution = Counter({int(hour): count for hour, count in hourly_distribution.items()})
+        
+        return type_counts, daily_activity, hourly_distribution, top_products
+    
+    def process_events(self, count_rows, product_rows):
+        """Fold grouped event counts into metric counters"""
+        type_counts = Counter()
+        daily_activity = Counter()
+        hourly_distribution = Counter()
+        
+        for row in count_rows:
+            count = row["count"]
+            type_counts[row.get("event_type")] += count
             
             # Daily activity
-            metrics["daily_activity"][date] += 1
+            daily_activity[row.get("date")] += count
             
             # Hourly distribution
-            metrics["hourly_distribution"][hour] += 1
+            hourly_distribution[row.get("hour")] += count
         
-        # Calculate error rate
-        metrics["error_rate"] = (error_count / total_events * 100) if total_events > 0 else 0
+        # GROUP BY yields one row per product, so the counts load in a single C-level update
+        top_products = Counter(dict(
+            (row.get("product_name", "Unknown"), row["count"]) for row in product_rows
+        ))
         
-        # Convert defaultdicts to regular dicts for JSON serialization
-        metrics["daily_activity"] = dict(metrics["daily_activity"])
-        metrics["hourly_distribution"] = dict(metrics["hourly_distribution"])
-        metrics["top_products"] = dict(sorted(
-            metrics["top_products"].items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        )[:10])
+        return type_counts, daily_activity, hourly_distribution, top_products
+    
+    def build_metrics(self, type_counts, daily_activity, hourly_distribution, top_products):
+        """Build the dashboard metrics dict from aggregated counters"""
+        total_events = sum(type_counts.values())
         
-        return metrics
+        return {
+            # Count by type
+            **{metric: type_counts[event_type] for event_type, metric in EVENT_TYPE_METRICS.items()},
+            # Convert Counters to regular dicts for JSON serialization
+            "daily_activity": dict(daily_activity),
+            "hourly_distribution": dict(hourly_distribution),
+            # Bounded heap keeps the top 10 without sorting every product
+            "top_products": dict(nlargest(10, top_products.items(), key=itemgetter(1))),
+            "approval_times": [],
+            # Calculate error rate
+            "error_rate": (type_counts["error"] / total_events * 100) if total_events > 0 else 0,
+            "total_events": total_events
+        }
+    
+    def get_dashboard_overview(self, tenant_id, days=30):
+        """Get dashboard data and performance metrics concurrently"""
+        performance = self._query_pool.submit(self.get_performance_metrics, tenant_id)
+        dashboard = self.get_dashboard_data(tenant_id, days)
+        return dashboard, performance.result()
     
     def get_performance_metrics(self, tenant_id):
         """Get performance metrics"""
+        cache_key = (tenant_id, "performance")
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             # Get recent performance data
-            query = """
-                SELECT * FROM c 
-                WHERE c.tenant_id = @tenant_id 
-                AND c.event_type = @event_type
-                AND c.timestamp >= @start_time
-            """
-            
-            start_time = (datetime.now() - timedelta(hours=24)).isoformat()
-            
-            performance_events = list(self.analytics_container.query_items(
-                query=query,
-                parameters=[
-                    {"name": "@tenant_id", "value": tenant_id},
-                    {"name": "@event_type", "value": "performance"},
-                    {"name": "@start_time", "value": start_time}
-                ]
+            start_ts = int(time.time()) - 24 * 3600
+            
+            rows = list(self.analytics_container.query_items(
+                query=PERFORMANCE_QUERY,
+                parameters=query_parameters(
+                    tenant_id=tenant_id,
+                    event_type="performance",
+                    start_ts=start_ts,
+                    # Older events only have a local-time ISO timestamp
+                    start_time=datetime.fromtimestamp(start_ts).isoformat()
+                ),
+                **self._tenant_scope(self.analytics_container, tenant_id)
             ))
             
-            if not performance_events:
+            stats = rows[0] if rows else {}
+            if not stats.get("total_requests"):
                 return {"message": "No performance data available"}
             
-            # Calculate metrics
-            response_times = [e["event_data"]["response_time"] for e in performance_events if "response_time" in e["event_data"]]
-            
-            return {
-                "avg_response_time": sum(response_times) / len(response_times) if response_times else 0,
-                "max_response_time": max(response_times) if response_times else 0,
-                "min_response_time": min(response_times) if response_times else 0,
-                "total_requests": len(performance_events)
+            performance = {
+                "avg_response_time": stats.get("avg_response_time", 0),
+                "max_response_time": stats.get("max_response_time", 0),
+                "min_response_time": stats.get("min_response_time", 0),
+                "total_requests": stats["total_requests"]
             }
+            self._set_cached(cache_key, performance)
+            
+            return performance
             
         except Exception as e:
-            print(f"❌ Error getting performance metrics: {e}")
+            self._record_error("performance_query", "Error getting performance metrics")
             return {"error": str(e)}
 
 # Global instance
@@ -1,40 +1,78 @@
 import json
 import re
 import random
-from datetime import datetime
 import string
+import sys
 import os
-import tempfile
-from PIL import Image
-import pytesseract
-import fitz  
-from werkzeug.utils import secure_filename
-from flask import Flask, request, jsonify, redirect, url_for, render_template_string, Response
+import uuid
+import time
+import traceback
+import threading
+from datetime import datetime, timedelta
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from werkzeug.utils import secure_filename
+from flask import Flask, request, jsonify, redirect, url_for, render_template_string, Response, g
+from flask.json.provider import DefaultJSONProvider
 import requests
+from requests.adapters import HTTPAdapter
+from azure.core.pipeline.transport import RequestsTransport
+from azure.storage.blob import BlobServiceClient
 from cosmos_db_utils import enhanced_cosmos_db as cosmos_db
-from azure_search_utils import get_comprehensive_context, format_context_for_prompt
 from azure_cache_utils import azure_cache
-import os
-from datetime import datetime
 from azure_monitoring import azure_monitoring
-from azure.storage.blob import BlobServiceClient, generate_blob_sas, BlobSasPermissions
-from datetime import datetime, timedelta
-import uuid
-from azure_secrets import get_blob_connection
-from pathlib import Path
+from azure_secrets import azure_secrets, get_blob_connection
 from rate_limiter import rate_limit, rate_limiter
 from performance_monitor import performance_monitor
-from flask import g
 from workflow_engine import workflow_engine, ApprovalStatus
 from tenant_manager import tenant_manager
 from analytics_engine import analytics_engine
-from audit_logger import audit_log
+from audit_logger import audit_log, audit_logger
+from azure_openai_utils import azure_openai
+from event_grid_integration import working_event_handler
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    json_loads = json.loads
+
+# Optional services: OCR falls back to local tesseract and PDF routes answer 503 without them
+try:
+    from azure_document_intelligence import azure_doc_intelligence
+except Exception as e:
+    print(f"⚠️ Azure Document Intelligence unavailable: {e}")
+    azure_doc_intelligence = None
+
+try:
+    from pdf_generator import pdf_generator
+except ImportError as e:
+    print(f"⚠️ PDF generation unavailable: {e}")
+    pdf_generator = None
+
+def json_dumps_pretty(obj):
+    """Serialize to 2-space indented JSON for display, using orjson when available"""
+    if orjson is None:
+        return json.dumps(obj, indent=2)
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, keeping Flask's key sorting and date format"""
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
+if orjson is not None:
+    app.json = ORJSONProvider(app)
 azure_monitoring.init_app(app)
-global_parameters = []
-global_json_template = {}
 
 # system prompt with comprehensive QC requirements
 SYSTEM_PROMPT = """
@@ -245,16 +283,18 @@ Focus on creating comprehensive, professional parameters that maintain the struc
 
 
 
+# JSON code blocks (```json ... ```) in LLM responses
+JSON_BLOCK_RE = re.compile(r'```json\s*(.*?)\s*```', re.DOTALL | re.IGNORECASE)
+
+# Characters that matter when scanning a raw JSON array: escapes, quotes and brackets
+JSON_STRUCTURE_RE = re.compile(r'\\.|["\[\]]', re.DOTALL)
+
 def extract_top_level_json_array(text):
     """
     function to extract JSON array from text, handling both raw JSON and code blocks
     """
     # First try to find JSON in code blocks (```json ... ```)
-    import re
-    
-    # Look for JSON code blocks
-    json_block_pattern = r'```json\s*(.*?)\s*```'
-    json_block_match = re.search(json_block_pattern, text, re.DOTALL | re.IGNORECASE)
+    json_block_match = JSON_BLOCK_RE.search(text)
     
     if json_block_match:
         json_content = json_block_match.group(1).strip()
@@ -267,43 +307,68 @@ def extract_top_level_json_array(text):
     if start == -1:
         return ""
     
+    # Jump between structural characters only, ignoring brackets inside strings
     balance = 0
-    end = start
-    for i in range(start, len(text)):
-        char = text[i]
-        if char == '[':
+    in_string = False
+    for match in JSON_STRUCTURE_RE.finditer(text, start):
+        token = match.group()
+        if token == '"':
+            in_string = not in_string
+        elif in_string:
+            continue  # Escape sequence or bracket inside a string value
+        elif token == '[':
             balance += 1
-        elif char == ']':
+        elif token == ']':
             balance -= 1
             if balance == 0:
-                end = i
-                break
+                return text[start:match.end()]
     
-    return text[start:end+1]
+    return text[start:start+1]
 
 # Replace the existing function in app.py with this version
 
 def call_groq_llm(user_message, doc_type, product_name, supplier_name, existing_parameters=None, is_digitization=False):
     """Wrapper function - now uses Azure OpenAI instead of Groq"""
-    from azure_openai_utils import azure_openai
     return azure_openai.call_openai_llm(user_message, doc_type, product_name, supplier_name, existing_parameters, is_digitization)
 
 
+def print_llm_response(title, llm_response):
+    """Print the start of an LLM response, only when running in debug mode"""
+    if not app.debug:
+        return
+    print(f"\n🎯 {title}:")
+    print("=" * 50)
+    print(f"{llm_response[:500]}{'...' if len(llm_response) > 500 else ''}")
+    print("=" * 50)
+
 def parse_llm_changes(llm_text):
     """Parse LLM response into summary and changes"""
     json_array_text = extract_top_level_json_array(llm_text)
     changes = []
     if json_array_text:
         try:
-            changes = json.loads(json_array_text)
+            changes = json_loads(json_array_text)
         except Exception as e:
             print("JSON parse error:", e)
     summary_text = llm_text.replace(json_array_text, "").strip() if json_array_text else llm_text.strip()
     return summary_text, changes
 
+def normalize_options(options):
+    """Normalize comma-separated or list options into a list of non-empty strings"""
+    if not options:
+        return []
+    if isinstance(options, str):
+        options = options.split(",")
+    return [opt for opt in (str(o).strip() for o in options) if opt]
+
+VALID_PARAM_TYPES = frozenset(["Checklist", "Dropdown", "Image Upload", "Remarks", "Text Input", "Numeric Input", "Toggle"])
+
 def apply_changes_to_params(parameters, changes):
     """Apply changes to parameters with parameter handling"""
-    valid_types = ["Checklist", "Dropdown", "Image Upload", "Remarks", "Text Input", "Numeric Input", "Toggle"]
+    # Index positions by lowercased name; removed entries are left as None until the end
+    name_index = {}
+    for i, p in enumerate(parameters):
+        name_index.setdefault(p["Parameter"].lower(), []).append(i)
 
     for change in changes:
         if not isinstance(change, dict):
@@ -312,18 +377,12 @@ def apply_changes_to_params(parameters, changes):
             
         action = change.get("action", "").lower()
         p_name = change.get("Parameter", "Unnamed")
-        options = change.get("DropdownOptions", "")
-        checklist_options = change.get("ChecklistOptions", "")
-        
-        # Handle both DropdownOptions and ChecklistOptions
-        if not options and checklist_options:
-            options = checklist_options
-        if isinstance(options, list):
-            options = ", ".join(options)
+        # Handle both DropdownOptions and ChecklistOptions, kept as a list from here on
+        options = normalize_options(change.get("DropdownOptions") or change.get("ChecklistOptions"))
 
         if action == "add":
             new_type = change.get("Type", "Text Input")
-            if new_type not in valid_types:
+            if new_type not in VALID_PARAM_TYPES:
                 new_type = "Text Input"
                 
             new_param = {
@@ -335,32 +394,698 @@ def apply_changes_to_params(parameters, changes):
                 "Section": change.get("Section", "General"),
                 "ClauseReference": change.get("ClauseReference", "")
             }
+            name_index.setdefault(p_name.lower(), []).append(len(parameters))
             parameters.append(new_param)
             
         elif action == "remove":
-            parameters[:] = [p for p in parameters if p["Parameter"].lower() != p_name.lower()]
+            for i in name_index.pop(p_name.lower(), []):
+                parameters[i] = None
             
         elif action == "update":
-            for p in parameters:
-                if p["Parameter"].lower() == p_name.lower():
-                    new_type = change.get("Type", "Text Input")
-                    if new_type not in valid_types:
-                        new_type = "Text Input"
-                    p["Type"] = new_type
-                    p["Spec"] = change.get("Spec", "")
-                    p["DropdownOptions"] = options  
-                    p["IncludeRemarks"] = change.get("IncludeRemarks", "No")
-                    p["Section"] = change.get("Section", "General")
-                    p["ClauseReference"] = change.get("ClauseReference", "")
-                    break
-
+            matches = name_index.get(p_name.lower())
+            if matches:
+                p = parameters[matches[0]]
+                new_type = change.get("Type", "Text Input")
+                if new_type not in VALID_PARAM_TYPES:
+                    new_type = "Text Input"
+                p["Type"] = new_type
+                p["Spec"] = change.get("Spec", "")
+                p["DropdownOptions"] = options  
+                p["IncludeRemarks"] = change.get("IncludeRemarks", "No")
+                p["Section"] = change.get("Section", "General")
+                p["ClauseReference"] = change.get("ClauseReference", "")
+
+    parameters[:] = [p for p in parameters if p is not None]
     return parameters
 
+# Full-width tools; the form renderer reads the largest double as "fill available width"
+MAX_TOOL_WIDTH = sys.float_info.max
+
+# Tool skeletons for generate_json_template. Each tool is built from a
+# clone_tool() copy and only the variable fields are filled in.
+HEADING_TOOL_TEMPLATE = {
+    "toolId": "",
+    "toolType": "HEADING",
+    "textData": {
+        "text": "",
+        "isBold": True,
+        "isItalic": False,
+        "isUnderlined": False,
+        "textAliend": "LEFT",
+        "color": 4294967295,  # White
+        "fontSize": 14
+    },
+    "boxData": {
+        "fillColor": 4288111521,  # Blue background
+        "borderEnable": False,
+        "borderColor": 4294967295,
+        "borderWidth": 0.8,
+        "boxAlignment": "CENTER_LEFT",
+        "cornerRadius": {
+            "topLeft": 0,
+            "topRight": 0,
+            "bottomLeft": 0,
+            "bottomRight": 0
+        },
+        "padding": {
+            "top": 4,
+            "bottom": 4,
+            "left": 9,
+            "right": 4
+        },
+        "margin": {
+            "top": 0,
+            "bottom": 0,
+            "left": 0,
+            "right": 0
+        }
+    },
+    "toolWidth": MAX_TOOL_WIDTH
+}
+
+SUPPLIER_TEXT_TEMPLATE = {
+    "toolId": "",
+    "toolType": "TEXT",
+    "textData": {
+        "text": "",
+        "isBold": True,
+        "isItalic": False,
+        "isUnderlined": False,
+        "textAliend": "LEFT",
+        "color": 4278190080,  # Black
+        "fontSize": 12
+    },
+    "toolHeight": 30,
+    "toolWidth": MAX_TOOL_WIDTH
+}
+
+SECTION_HEADER_TEMPLATE = {
+    "toolId": "",
+    "toolType": "TEXT",
+    "textData": {
+        "text": "",
+        "isBold": True,
+        "isItalic": False,
+        "isUnderlined": True,
+        "textAliend": "LEFT",
+        "color": 4283215696,  # Green
+        "fontSize": 13
+    },
+    "toolHeight": 35,
+    "toolWidth": MAX_TOOL_WIDTH
+}
+
+FINAL_ASSESSMENT_HEADER_TEMPLATE = {
+    "toolId": "",
+    "toolType": "TEXT",
+    "textData": {
+        "text": "FINAL ASSESSMENT",
+        "isBold": True,
+        "isItalic": False,
+        "isUnderlined": True,
+        "textAliend": "CENTER",
+        "color": 4283215696,  # Green
+        "fontSize": 14
+    },
+    "toolHeight": 35,
+    "toolWidth": MAX_TOOL_WIDTH
+}
+
+OVERALL_TOGGLE_TEMPLATE = {
+    "toolId": "",
+    "toolType": "TOGGLE",
+    "toggleData": {
+        "disabledColor": 4294198070,  # Red
+        "disabledText": "REJECTED",
+        "enabledColor": 4283215696,  # Green
+        "enabledText": "APPROVED",
+        "showLabel": True,
+        "label": "Overall Quality Assessment",
+        "labelFontSize": 15,
+        "labelTextColor": 4278190080,  # Black
+        "isBold": True,
+        "isItalic": False,
+        "isSelected": True,
+        "toggleTextFontSize": 14,
+        "toggleTextIsBold": True
+    },
+    "toolWidth": MAX_TOOL_WIDTH,
+    "toolHeight": 100
+}
+
+INSPECTOR_INFO_TEMPLATE = {
+    "toolId": "",
+    "toolType": "TEXTAREA",
+    "lableData": {
+        "text": "Inspector Name & Signature:",
+        "isBold": True,
+        "isItalic": False,
+        "isUnderlined": False,
+        "textAliend": "LEFT",
+        "fontSize": 14,
+        "lablePositioned": "TOP_LEFT",
+        "spacing": 5,
+        "txtColor": 4278190080,  # Black
+        "showLable": True
+    },
+    "textAreaData": {
+        "isFilled": True,
+        "fillColor": 4292927712,  # Light gray
+        "borderType": "UNDERLINED",
+        "storkStyle": "LINE",
+        "dummyTxt": "Inspector name and signature",
+        "borderColor": 4278190080,  # Black
+        "isBold": False,
+        "isItalic": False,
+        "isUnderlined": False,
+        "fontSize": 12,
+        "txtColor": 4288585374  # Gray
+    },
+    "toolHeight": 80,
+    "toolWidth": MAX_TOOL_WIDTH,
+    "showToggle": False
+}
+
+FINAL_REMARKS_TEMPLATE = {
+    "toolId": "",
+    "toolType": "TEXTAREA",
+    "lableData": {
+        "text": "Final Comprehensive Remarks:",
+        "isBold": True,
+        "isItalic": False,
+        "isUnderlined": False,
+        "textAliend": "LEFT",
+        "fontSize": 14,
+        "lablePositioned": "TOP_LEFT",
+        "spacing": 5,
+        "txtColor": 4278190080,  # Black
+        "showLable": True
+    },
+    "textAreaData": {
+        "isFilled": True,
+        "fillColor": 4292927712,  # Light gray
+        "borderType": "UNDERLINED",
+        "storkStyle": "LINE",
+        "dummyTxt": "Overall assessment, corrective actions, and additional observations",
+        "borderColor": 4278190080,  # Black
+        "isBold": False,
+        "isItalic": False,
+        "isUnderlined": False,
+        "fontSize": 12,
+        "txtColor": 4288585374  # Gray
+    },
+    "toolHeight": 120,
+    "toolWidth": MAX_TOOL_WIDTH,
+    "showToggle": False
+}
+
+# Fixed tools appended after all parameters, in order
+FINAL_TOOL_TEMPLATES = [
+    FINAL_ASSESSMENT_HEADER_TEMPLATE,
+    OVERALL_TOGGLE_TEMPLATE,
+    INSPECTOR_INFO_TEMPLATE,
+    FINAL_REMARKS_TEMPLATE
+]
+
+IMAGE_TOOL_TEMPLATE = {
+    "toolId": "",
+    "toolType": "IMAGE",
+    "imageLableData": {
+        "text": "",
+        "isBold": True,
+        "isItalic": False,
+        "isUnderlined": False,
+        "textAliend": "LEFT",
+        "fontSize": 14,
+        "lablePositioned": "LEFT",
+        "spacing": 10,
+        "txtColor": 4278190080,  # Black
+        "showLable": True
+    },
+    "imageData": {
+        "showImageUploadArea": True,
+        "width": 200,
+        "height": 150
+    },
+    "iconData": 57344,
+    "showIcon": False,
+    "iconCodePoint": 59729,
+    "iconSize": 30,
+    "iconColor": 4278190080,  # Black
+    "toolHeight": 160,
+    "toolWidth": MAX_TOOL_WIDTH,
+    "showToggle": True,
+    "imageToggleData": {
+        "label": "Assessment",
+        "isBold": True,
+        "isItalic": False,
+        "isUnderlined": False,
+        "fontSize": 14,
+        "showLabel": True,
+        "enabledText": "Acceptable",
+        "disabledText": "Not Acceptable",
+        "enabledColor": 4283215696,  # Green
+        "disabledColor": 4294198070,  # Red
+        "isSelected": True
+    }
+}
+
+TOGGLE_TOOL_TEMPLATE = {
+    "toolId": "",
+    "toolType": "TOGGLE",
+    "toggleData": {
+        "disabledColor": 4294198070,  # Red
+        "disabledText": "",
+        "enabledColor": 4283215696,  # Green
+        "enabledText": "",
+        "showLabel": True,
+        "label": "",
+        "labelFontSize": 14,
+        "labelTextColor": 4278190080,  # Black
+        "isBold": True,
+        "isItalic": False,
+        "isSelected": True,
+        "toggleTextFontSize": 12,
+        "toggleTextIsBold": False
+    },
+    "toolWidth": MAX_TOOL_WIDTH,
+    "toolHeight": 80
+}
+
+DROPDOWN_TOOL_TEMPLATE = {
+    "toolId": "",
+    "toolType": "DROPDOWN",
+    "dropdownData": {
+        "hintText": "",
+        "hintTextColor": 4288585374,  # Gray
+        "hintFontSize": 14,
+        "dropdownWidth": 350,
+        "spacingBetweeenLableAndDropdownWidth": 10,
+        "showLable": True,
+        "labelText": "",
+        "isBold": True,
+        "isItalic": False,
+        "isUnderlined": False,
+        "textAliend": "LEFT",
+        "lablePositioned": "TOP",
+        "labelFontSize": 14,
+        "lableTextColor": 4278190080,  # Black
+        "numberOfOptions": 3,
+        "optionFontSize": 14,
+        "optionTextColor": 4278190080,  # Black
+        "optionLst": [],
+        "selectedOptionIndex": -1
+    },
+    "toolHeight": 90,
+    "toolWidth": MAX_TOOL_WIDTH
+}
+
+CHECKBOX_TOOL_TEMPLATE = {
+    "toolId": "",
+    "toolType": "CHECKBOX",
+    "checkboxData": {
+        "numberOfCheckboxes": 0,
+        "checkboxBgColor": 4294967295,  # White
+        "spacing": 8,
+        "runSpacing": 8,
+        "checkboxTileWidth": 140,
+        "checkBoxAlignmentEnum": "HORIZONTAL",
+        "checkBoxButtonStyleEnum": "CHECKBOX",
+        "checkBoxPositionedEnum": "START",
+        "checkBoxSelectionModeEnum": "MULTIPLE",
+        "isBold": False,
+        "isItalic": False,
+        "isUnderlined": False,
+        "textAliend": "LEFT",
+        "fontSize": 13,
+        "lablePositioned": "LEFT",
+        "txtColor": 4278190080,  # Black
+        "labelLst": [],
+        "showLable": True,
+        "selectedIndexLstForMultiSelect": [],
+        "selectedIndexForSingleSelect": 0
+    },
+    "toolWidth": MAX_TOOL_WIDTH,
+    "toolHeight": 100
+}
+
+CHECKLIST_LABEL_TEMPLATE = {
+    "toolId": "",
+    "toolType": "TEXT",
+    "textData": {
+        "text": "",
+        "isBold": True,
+        "isItalic": False,
+        "isUnderlined": False,
+        "textAliend": "LEFT",
+        "color": 4278190080,  # Black
+        "fontSize": 14
+    },
+    "toolHeight": 25,
+    "toolWidth": MAX_TOOL_WIDTH
+}
+
+NUMERIC_TOOL_TEMPLATE = {
+    "toolId": "",
+    "toolType": "TEXTAREA",
+    "lableData": {
+        "text": "",
+        "isBold": True,
+        "isItalic": False,
+        "isUnderlined": False,
+        "textAliend": "LEFT",
+        "fontSize": 14,
+        "lablePositioned": "TOP_LEFT",
+        "spacing": 5,
+        "txtColor": 4278190080,  # Black
+        "showLable": True
+    },
+    "textAreaData": {
+        "isFilled": True,
+        "fillColor": 4292927712,  # Light gray
+        "borderType": "UNDERLINED",
+        "storkStyle": "LINE",
+        "dummyTxt": "",
+        "borderColor": 4278190080,  # Black
+        "isBold": False,
+        "isItalic": False,
+        "isUnderlined": False,
+        "fontSize": 12,
+        "txtColor": 4288585374  # Gray
+    },
+    "toolHeight": 75,
+    "toolWidth": MAX_TOOL_WIDTH,
+    "toggleData": {
+        "label": "Status",
+        "isBold": True,
+        "isItalic": False,
+        "isUnderlined": False,
+        "fontSize": 12,
+        "showLabel": True,
+        "enabledText": "Within Spec",
+        "disabledText": "Out of Spec",
+        "enabledColor": 4283215696,  # Green
+        "disabledColor": 4294198070,  # Red
+        "isSelected": True
+    },
+    "showToggle": True  # Show toggle for spec compliance
+}
+
+TEXT_TOOL_TEMPLATE = {
+    "toolId": "",
+    "toolType": "TEXTAREA",
+    "lableData": {
+        "text": "",
+        "isBold": True,
+        "isItalic": False,
+        "isUnderlined": False,
+        "textAliend": "LEFT",
+        "fontSize": 14,
+        "lablePositioned": "TOP_LEFT",
+        "spacing": 5,
+        "txtColor": 4278190080,  # Black
+        "showLable": True
+    },
+    "textAreaData": {
+        "isFilled": True,
+        "fillColor": 4292927712,  # Light gray
+        "borderType": "UNDERLINED",
+        "storkStyle": "LINE",
+        "dummyTxt": "",
+        "borderColor": 4278190080,  # Black
+        "isBold": False,
+        "isItalic": False,
+        "isUnderlined": False,
+        "fontSize": 12,
+        "txtColor": 4288585374  # Gray
+    },
+    "toolHeight": 65,
+    "toolWidth": MAX_TOOL_WIDTH,
+    "showToggle": False
+}
+
+REMARKS_TOOL_TEMPLATE = {
+    "toolId": "",
+    "toolType": "TEXTAREA",
+    "lableData": {
+        "text": "",
+        "isBold": True,
+        "isItalic": False,
+        "isUnderlined": False,
+        "textAliend": "LEFT",
+        "fontSize": 14,
+        "lablePositioned": "TOP_LEFT",
+        "spacing": 5,
+        "txtColor": 4278190080,  # Black
+        "showLable": True
+    },
+    "textAreaData": {
+        "isFilled": True,
+        "fillColor": 4292927712,  # Light gray
+        "borderType": "UNDERLINED",
+        "storkStyle": "LINE",
+        "dummyTxt": "Enter detailed observations and remarks",
+        "borderColor": 4278190080,  # Black
+        "isBold": False,
+        "isItalic": False,
+        "isUnderlined": False,
+        "fontSize": 12,
+        "txtColor": 4288585374  # Gray
+    },
+    "toolHeight": 100,  # Larger height for remarks
+    "toolWidth": MAX_TOOL_WIDTH,
+    "showToggle": False
+}
+
+ADDITIONAL_REMARKS_TEMPLATE = {
+    "toolId": "",
+    "toolType": "TEXTAREA",
+    "lableData": {
+        "text": "",
+        "isBold": False,
+        "isItalic": True,
+        "isUnderlined": False,
+        "textAliend": "LEFT",
+        "fontSize": 12,
+        "lablePositioned": "TOP_LEFT",
+        "spacing": 5,
+        "txtColor": 4278190080,  # Black
+        "showLable": True
+    },
+    "textAreaData": {
+        "isFilled": True,
+        "fillColor": 4292927712,  # Light gray
+        "borderType": "UNDERLINED",
+        "storkStyle": "LINE",
+        "dummyTxt": "Additional observations or corrective actions",
+        "borderColor": 4278190080,  # Black
+        "isBold": False,
+        "isItalic": False,
+        "isUnderlined": False,
+        "fontSize": 11,
+        "txtColor": 4288585374  # Gray
+    },
+    "toolHeight": 60,
+    "toolWidth": MAX_TOOL_WIDTH,
+    "showToggle": False
+}
+
+TOOL_ID_ALPHABET = string.ascii_lowercase + string.digits
+
+def generate_tool_id():
+    """Generate a short random tool ID"""
+    return ''.join(random.choices(TOOL_ID_ALPHABET, k=5))
+
+def clone_tool(tool_template):
+    """Copy a tool template one level deep so its nested dicts can be filled in"""
+    return {key: value.copy() if isinstance(value, dict) else value for key, value in tool_template.items()}
+
+def build_image_tools(param_name, display_name, option_list, spec):
+    """Build an image upload tool with assessment toggle"""
+    image_tool = clone_tool(IMAGE_TOOL_TEMPLATE)
+    image_tool["toolId"] = generate_tool_id()
+    image_tool["imageLableData"]["text"] = f"{display_name}:"
+    return [image_tool]
+
+def build_toggle_tools(param_name, display_name, option_list, spec):
+    """Build a toggle tool"""
+    toggle_tool = clone_tool(TOGGLE_TOOL_TEMPLATE)
+    toggle_tool["toolId"] = generate_tool_id()
+    toggle_data = toggle_tool["toggleData"]
+    if option_list:
+        toggle_data["enabledText"] = option_list[0]
+        toggle_data["disabledText"] = option_list[1] if len(option_list) > 1 else "No"
+    else:
+        toggle_data["enabledText"] = "Acceptable"
+        toggle_data["disabledText"] = "Not Acceptable"
+    toggle_data["label"] = display_name
+    return [toggle_tool]
+
+def build_dropdown_tools(param_name, display_name, option_list, spec):
+    """Build a dropdown tool"""
+    dropdown_tool = clone_tool(DROPDOWN_TOOL_TEMPLATE)
+    dropdown_tool["toolId"] = generate_tool_id()
+    dropdown_data = dropdown_tool["dropdownData"]
+    dropdown_data["hintText"] = f"Select {param_name.lower()}"
+    dropdown_data["labelText"] = display_name
+    dropdown_data["numberOfOptions"] = len(option_list) if option_list else 3
+    dropdown_data["optionLst"] = option_list if option_list else ["Acceptable", "Marginal", "Not Acceptable"]
+    return [dropdown_tool]
+
+def build_checklist_tools(param_name, display_name, option_list, spec):
+    """Build a checklist label followed by its checkbox tool"""
+    if not option_list:
+        option_list = ["Item 1", "Item 2", "Item 3"]
+        
+    checkbox_tool = clone_tool(CHECKBOX_TOOL_TEMPLATE)
+    checkbox_tool["toolId"] = generate_tool_id()
+    checkbox_data = checkbox_tool["checkboxData"]
+    checkbox_data["numberOfCheckboxes"] = len(option_list)
+    checkbox_data["labelLst"] = option_list
+    checkbox_data["selectedIndexLstForMultiSelect"] = []
+    checkbox_tool["toolHeight"] = max(100, len(option_list) * 15 + 40)  # Dynamic height based on items
+    
+    checklist_label = clone_tool(CHECKLIST_LABEL_TEMPLATE)
+    checklist_label["toolId"] = generate_tool_id()
+    checklist_label["textData"]["text"] = f"{display_name}:"
+    return [checklist_label, checkbox_tool]
+
+def build_numeric_tools(param_name, display_name, option_list, spec):
+    """Build a numeric input with spec compliance toggle"""
+    numeric_tool = clone_tool(NUMERIC_TOOL_TEMPLATE)
+    numeric_tool["toolId"] = generate_tool_id()
+    if spec:
+        numeric_tool["lableData"]["text"] = f"{display_name} (Spec: {spec}):"
+        numeric_tool["textAreaData"]["dummyTxt"] = f"Enter numeric value ({spec})"
+    else:
+        numeric_tool["lableData"]["text"] = f"{display_name}:"
+        numeric_tool["textAreaData"]["dummyTxt"] = "Enter numeric value"
+    return [numeric_tool]
+
+def build_text_tools(param_name, display_name, option_list, spec):
+    """Build a text input"""
+    text_tool = clone_tool(TEXT_TOOL_TEMPLATE)
+    text_tool["toolId"] = generate_tool_id()
+    text_tool["lableData"]["text"] = f"{display_name}:"
+    text_tool["textAreaData"]["dummyTxt"] = f"Enter {param_name.lower()}"
+    return [text_tool]
+
+def build_remarks_tools(param_name, display_name, option_list, spec):
+    """Build a remarks textarea"""
+    remarks_tool = clone_tool(REMARKS_TOOL_TEMPLATE)
+    remarks_tool["toolId"] = generate_tool_id()
+    remarks_tool["lableData"]["text"] = f"{display_name}:"
+    return [remarks_tool]
+
+# Parameter type -> tool builder used by generate_json_template
+TOOL_BUILDERS = {
+    "Image Upload": build_image_tools,
+    "Toggle": build_toggle_tools,
+    "Dropdown": build_dropdown_tools,
+    "Checklist": build_checklist_tools,
+    "Numeric Input": build_numeric_tools,
+    "Text Input": build_text_tools,
+    "Remarks": build_remarks_tools
+}
+
+def parse_dropdown_tool(tool):
+    """Convert a DROPDOWN template tool back into a parameter"""
+    dropdown_data = tool.get("dropdownData", {})
+    return {
+        "Parameter": dropdown_data.get("labelText", "Dropdown Field"),
+        "Type": "Dropdown",
+        "Spec": "",
+        "DropdownOptions": normalize_options(dropdown_data.get("optionLst")),
+        "IncludeRemarks": "No",
+        "Section": "General",
+        "ClauseReference": ""
+    }
+
+def parse_checkbox_tool(tool):
+    """Convert a CHECKBOX template tool back into a parameter"""
+    checkbox_data = tool.get("checkboxData", {})
+    return {
+        "Parameter": "Checklist Group",
+        "Type": "Checklist",
+        "Spec": "",
+        "DropdownOptions": normalize_options(checkbox_data.get("labelLst")),
+        "IncludeRemarks": "No",
+        "Section": "General",
+        "ClauseReference": ""
+    }
+
+def parse_image_tool(tool):
+    """Convert an IMAGE template tool back into a parameter"""
+    image_data = tool.get("imageLableData", {})
+    return {
+        "Parameter": image_data.get("text", "Image Upload").replace(":", ""),
+        "Type": "Image Upload",
+        "Spec": "Visual inspection with photo evidence",
+        "DropdownOptions": [],
+        "IncludeRemarks": "Yes",
+        "Section": "Visual Inspection",
+        "ClauseReference": ""
+    }
+
+def parse_toggle_tool(tool):
+    """Convert a TOGGLE template tool back into a parameter"""
+    toggle_data = tool.get("toggleData", {})
+    return {
+        "Parameter": toggle_data.get("label", "Toggle Assessment"),
+        "Type": "Toggle",
+        "Spec": "",
+        "DropdownOptions": normalize_options([toggle_data.get("enabledText", "Yes"), toggle_data.get("disabledText", "No")]),
+        "IncludeRemarks": "No",
+        "Section": "Assessment",
+        "ClauseReference": ""
+    }
+
+def parse_textarea_tool(tool):
+    """Convert a TEXTAREA template tool back into a remarks, numeric or text parameter"""
+    label_data = tool.get("lableData", {})
+    text_area_data = tool.get("textAreaData", {})
+    label_text = label_data.get("text", "").replace(":", "")
+    dummy_text = text_area_data.get("dummyTxt", "")
+    
+    if "Remarks" in label_text or "remarks" in dummy_text:
+        param_type = "Remarks"
+    elif "numeric" in dummy_text.lower():
+        param_type = "Numeric Input"
+    else:
+        param_type = "Text Input"
+        
+    return {
+        "Parameter": label_text,
+        "Type": param_type,
+        "Spec": "",
+        "DropdownOptions": [],
+        "IncludeRemarks": "No",
+        "Section": "General",
+        "ClauseReference": ""
+    }
+
+# Template toolType -> parameter parser used when editing an uploaded JSON template
+TEMPLATE_TOOL_PARSERS = {
+    "DROPDOWN": parse_dropdown_tool,
+    "CHECKBOX": parse_checkbox_tool,
+    "IMAGE": parse_image_tool,
+    "TOGGLE": parse_toggle_tool,
+    "TEXTAREA": parse_textarea_tool
+}
+
+def template_json_response(template_body):
+    """Wrap a serialized JSON template in a response with an ETag, answering revalidations with 304"""
+    response = Response(template_body, mimetype='application/json')
+    response.add_etag()
+    response.headers["Cache-Control"] = "private, max-age=300"
+    return response.make_conditional(request)
+
 def generate_json_template(doc_type, product_name, supplier_name, parameters):
     """
     JSON template generation with intelligent parameter type handling.
     """
     header_text = f"{product_name} {doc_type}"
+    tools = []
     template = {
         "templateId": "neY5j",
         "isDrafted": False,
@@ -375,7 +1100,7 @@ def generate_json_template(doc_type, product_name, supplier_name, parameters):
             "headerImgUrl": "",
             "fotterImgUrl": ""
         },
-        "pageToolsDataList": [],
+        "pageToolsDataList": tools,
         "workflowInfo": {
             "currentState": "Draft",
             "approvalStates": ["Draft", "Under Review", "Approved", "Rejected"],
@@ -404,69 +1129,17 @@ def generate_json_template(doc_type, product_name, supplier_name, parameters):
         }
     }
     
-    def generate_tool_id():
-        return ''.join(random.choices(string.ascii_lowercase + string.digits, k=5))
-    
     # Add main header
-    title_text = header_text
-    heading_tool = {
-        "toolId": generate_tool_id(),
-        "toolType": "HEADING",
-        "textData": {
-            "text": title_text,
-            "isBold": True,
-            "isItalic": False,
-            "isUnderlined": False,
-            "textAliend": "LEFT",
-            "color": 4294967295,  # White
-            "fontSize": 14
-        },
-        "boxData": {
-            "fillColor": 4288111521,  # Blue background
-            "borderEnable": False,
-            "borderColor": 4294967295,
-            "borderWidth": 0.8,
-            "boxAlignment": "CENTER_LEFT",
-            "cornerRadius": {
-                "topLeft": 0,
-                "topRight": 0,
-                "bottomLeft": 0,
-                "bottomRight": 0
-            },
-            "padding": {
-                "top": 4,
-                "bottom": 4,
-                "left": 9,
-                "right": 4
-            },
-            "margin": {
-                "top": 0,
-                "bottom": 0,
-                "left": 0,
-                "right": 0
-            }
-        },
-        "toolWidth": 1.7976931348623157e+308
-    }
-    template["pageToolsDataList"].append(heading_tool)
+    heading_tool = clone_tool(HEADING_TOOL_TEMPLATE)
+    heading_tool["toolId"] = generate_tool_id()
+    heading_tool["textData"]["text"] = header_text
+    tools.append(heading_tool)
     
     # Add supplier information
-    supplier_text = {
-        "toolId": generate_tool_id(),
-        "toolType": "TEXT",
-        "textData": {
-            "text": f"Supplier Name: {supplier_name}",
-            "isBold": True,
-            "isItalic": False,
-            "isUnderlined": False,
-            "textAliend": "LEFT",
-            "color": 4278190080,  # Black
-            "fontSize": 12
-        },
-        "toolHeight": 30,
-        "toolWidth": 1.7976931348623157e+308
-    }
-    template["pageToolsDataList"].append(supplier_text)
+    supplier_text = clone_tool(SUPPLIER_TEXT_TEMPLATE)
+    supplier_text["toolId"] = generate_tool_id()
+    supplier_text["textData"]["text"] = f"Supplier Name: {supplier_name}"
+    tools.append(supplier_text)
     
     # Group parameters by section for better organization
     sections = {}
@@ -480,22 +1153,10 @@ def generate_json_template(doc_type, product_name, supplier_name, parameters):
     for section_name, section_params in sections.items():
         # Add section header
         if section_name != "General Parameters":
-            section_header = {
-                "toolId": generate_tool_id(),
-                "toolType": "TEXT",
-                "textData": {
-                    "text": section_name.upper(),
-                    "isBold": True,
-                    "isItalic": False,
-                    "isUnderlined": True,
-                    "textAliend": "LEFT",
-                    "color": 4283215696,  # Green
-                    "fontSize": 13
-                },
-                "toolHeight": 35,
-                "toolWidth": 1.7976931348623157e+308
-            }
-            template["pageToolsDataList"].append(section_header)
+            section_header = clone_tool(SECTION_HEADER_TEMPLATE)
+            section_header["toolId"] = generate_tool_id()
+            section_header["textData"]["text"] = section_name.upper()
+            tools.append(section_header)
         
         # Add parameters in this section
         for param in section_params:
@@ -507,454 +1168,64 @@ def generate_json_template(doc_type, product_name, supplier_name, parameters):
             clause_ref = param.get("ClauseReference", "")
             
             # Create display name with clause reference
-            display_name = param_name
-            if clause_ref:
-                display_name += f" ({clause_ref})"
+            display_name = f"{param_name} ({clause_ref})" if clause_ref else param_name
             
-            # Split options into a list if it's a string
-            option_list = []
-            if isinstance(options, str) and options.strip():
-                option_list = [opt.strip() for opt in options.split(",") if opt.strip()]
+            # Options from applied changes are already lists; stored parameters carry strings
+            option_list = options if isinstance(options, list) else normalize_options(options)
             
             # PARAMETER TYPE HANDLING
-            if param_type == "Image Upload":
-                # Create image upload tool with toggle
-                image_tool = {
-                    "toolId": generate_tool_id(),
-                    "toolType": "IMAGE",
-                    "imageLableData": {
-                        "text": display_name + ":",
-                        "isBold": True,
-                        "isItalic": False,
-                        "isUnderlined": False,
-                        "textAliend": "LEFT",
-                        "fontSize": 14,
-                        "lablePositioned": "LEFT",
-                        "spacing": 10,
-                        "txtColor": 4278190080,  # Black
-                        "showLable": True
-                    },
-                    "imageData": {
-                        "showImageUploadArea": True,
-                        "width": 200,
-                        "height": 150
-                    },
-                    "iconData": 57344,
-                    "showIcon": False,
-                    "iconCodePoint": 59729,
-                    "iconSize": 30,
-                    "iconColor": 4278190080,  # Black
-                    "toolHeight": 160,
-                    "toolWidth": 1.7976931348623157e+308,
-                    "showToggle": True,
-                    "imageToggleData": {
-                        "label": "Assessment",
-                        "isBold": True,
-                        "isItalic": False,
-                        "isUnderlined": False,
-                        "fontSize": 14,
-                        "showLabel": True,
-                        "enabledText": "Acceptable",
-                        "disabledText": "Not Acceptable",
-                        "enabledColor": 4283215696,  # Green
-                        "disabledColor": 4294198070,  # Red
-                        "isSelected": True
-                    }
-                }
-                template["pageToolsDataList"].append(image_tool)
-                
-            elif param_type == "Toggle":
-                # Create toggle tool
-                toggle_tool = {
-                    "toolId": generate_tool_id(),
-                    "toolType": "TOGGLE",
-                    "toggleData": {
-                        "disabledColor": 4294198070,  # Red
-                        "disabledText": "Not Acceptable" if not option_list else option_list[1] if len(option_list) > 1 else "No",
-                        "enabledColor": 4283215696,  # Green
-                        "enabledText": "Acceptable" if not option_list else option_list[0] if option_list else "Yes",
-                        "showLabel": True,
-                        "label": display_name,
-                        "labelFontSize": 14,
-                        "labelTextColor": 4278190080,  # Black
-                        "isBold": True,
-                        "isItalic": False,
-                        "isSelected": True,
-                        "toggleTextFontSize": 12,
-                        "toggleTextIsBold": False
-                    },
-                    "toolWidth": 1.7976931348623157e+308,
-                    "toolHeight": 80
-                }
-                template["pageToolsDataList"].append(toggle_tool)
-                
-            elif param_type == "Dropdown":
-                # Create dropdown tool
-                dropdown_tool = {
-                    "toolId": generate_tool_id(),
-                    "toolType": "DROPDOWN",
-                    "dropdownData": {
-                        "hintText": f"Select {param_name.lower()}",
-                        "hintTextColor": 4288585374,  # Gray
-                        "hintFontSize": 14,
-                        "dropdownWidth": 350,
-                        "spacingBetweeenLableAndDropdownWidth": 10,
-                        "showLable": True,
-                        "labelText": display_name,
-                        "isBold": True,
-                        "isItalic": False,
-                        "isUnderlined": False,
-                        "textAliend": "LEFT",
-                        "lablePositioned": "TOP",
-                        "labelFontSize": 14,
-                        "lableTextColor": 4278190080,  # Black
-                        "numberOfOptions": len(option_list) if option_list else 3,
-                        "optionFontSize": 14,
-                        "optionTextColor": 4278190080,  # Black
-                        "optionLst": option_list if option_list else ["Acceptable", "Marginal", "Not Acceptable"],
-                        "selectedOptionIndex": -1
-                    },
-                    "toolHeight": 90,
-                    "toolWidth": 1.7976931348623157e+308
-                }
-                template["pageToolsDataList"].append(dropdown_tool)
-                
-            elif param_type == "Checklist":
-                # Create checkbox tool for checklists
-                if not option_list:
-                    option_list = ["Item 1", "Item 2", "Item 3"]
-                    
-                checkbox_tool = {
-                    "toolId": generate_tool_id(),
-                    "toolType": "CHECKBOX",
-                    "checkboxData": {
-                        "numberOfCheckboxes": len(option_list),
-                        "checkboxBgColor": 4294967295,  # White
-                        "spacing": 8,
-                        "runSpacing": 8,
-                        "checkboxTileWidth": 140,
-                        "checkBoxAlignmentEnum": "HORIZONTAL",
-                        "checkBoxButtonStyleEnum": "CHECKBOX",
-                        "checkBoxPositionedEnum": "START",
-                        "checkBoxSelectionModeEnum": "MULTIPLE",
-                        "isBold": False,
-                        "isItalic": False,
-                        "isUnderlined": False,
-                        "textAliend": "LEFT",
-                        "fontSize": 13,
-                        "lablePositioned": "LEFT",
-                        "txtColor": 4278190080,  # Black
-                        "labelLst": option_list,
-                        "showLable": True,
-                        "selectedIndexLstForMultiSelect": [],
-                        "selectedIndexForSingleSelect": 0
-                    },
-                    "toolWidth": 1.7976931348623157e+308,
-                    "toolHeight": max(100, len(option_list) * 15 + 40)  # Dynamic height based on items
-                }
-                
-                # Add section label for checklist
-                checklist_label = {
-                    "toolId": generate_tool_id(),
-                    "toolType": "TEXT",
-                    "textData": {
-                        "text": display_name + ":",
-                        "isBold": True,
-                        "isItalic": False,
-                        "isUnderlined": False,
-                        "textAliend": "LEFT",
-                        "color": 4278190080,  # Black
-                        "fontSize": 14
-                    },
-                    "toolHeight": 25,
-                    "toolWidth": 1.7976931348623157e+308
-                }
-                template["pageToolsDataList"].append(checklist_label)
-                template["pageToolsDataList"].append(checkbox_tool)
-                
-            elif param_type == "Numeric Input":
-                # Create numeric input with specification
-                label_text = display_name
-                if spec:
-                    label_text += f" (Spec: {spec})"
-                    
-                numeric_tool = {
-                    "toolId": generate_tool_id(),
-                    "toolType": "TEXTAREA",
-                    "lableData": {
-                        "text": label_text + ":",
-                        "isBold": True,
-                        "isItalic": False,
-                        "isUnderlined": False,
-                        "textAliend": "LEFT",
-                        "fontSize": 14,
-                        "lablePositioned": "TOP_LEFT",
-                        "spacing": 5,
-                        "txtColor": 4278190080,  # Black
-                        "showLable": True
-                    },
-                    "textAreaData": {
-                        "isFilled": True,
-                        "fillColor": 4292927712,  # Light gray
-                        "borderType": "UNDERLINED",
-                        "storkStyle": "LINE",
-                        "dummyTxt": "Enter numeric value" + (f" ({spec})" if spec else ""),
-                        "borderColor": 4278190080,  # Black
-                        "isBold": False,
-                        "isItalic": False,
-                        "isUnderlined": False,
-                        "fontSize": 12,
-                        "txtColor": 4288585374  # Gray
-                    },
-                    "toolHeight": 75,
-                    "toolWidth": 1.7976931348623157e+308,
-                    "toggleData": {
-                        "label": "Status",
-                        "isBold": True,
-                        "isItalic": False,
-                        "isUnderlined": False,
-                        "fontSize": 12,
-                        "showLabel": True,
-                        "enabledText": "Within Spec",
-                        "disabledText": "Out of Spec",
-                        "enabledColor": 4283215696,  # Green
-                        "disabledColor": 4294198070,  # Red
-                        "isSelected": True
-                    },
-                    "showToggle": True  # Show toggle for spec compliance
-                }
-                template["pageToolsDataList"].append(numeric_tool)
-                
-            elif param_type == "Text Input":
-                # Create text input
-                text_tool = {
-                    "toolId": generate_tool_id(),
-                    "toolType": "TEXTAREA",
-                    "lableData": {
-                        "text": display_name + ":",
-                        "isBold": True,
-                        "isItalic": False,
-                        "isUnderlined": False,
-                        "textAliend": "LEFT",
-                        "fontSize": 14,
-                        "lablePositioned": "TOP_LEFT",
-                        "spacing": 5,
-                        "txtColor": 4278190080,  # Black
-                        "showLable": True
-                    },
-                    "textAreaData": {
-                        "isFilled": True,
-                        "fillColor": 4292927712,  # Light gray
-                        "borderType": "UNDERLINED",
-                        "storkStyle": "LINE",
-                        "dummyTxt": "Enter " + param_name.lower(),
-                        "borderColor": 4278190080,  # Black
-                        "isBold": False,
-                        "isItalic": False,
-                        "isUnderlined": False,
-                        "fontSize": 12,
-                        "txtColor": 4288585374  # Gray
-                    },
-                    "toolHeight": 65,
-                    "toolWidth": 1.7976931348623157e+308,
-                    "showToggle": False
-                }
-                template["pageToolsDataList"].append(text_tool)
-                
-            elif param_type == "Remarks":
-                # Create remarks/textarea
-                remarks_tool = {
-                    "toolId": generate_tool_id(),
-                    "toolType": "TEXTAREA",
-                    "lableData": {
-                        "text": display_name + ":",
-                        "isBold": True,
-                        "isItalic": False,
-                        "isUnderlined": False,
-                        "textAliend": "LEFT",
-                        "fontSize": 14,
-                        "lablePositioned": "TOP_LEFT",
-                        "spacing": 5,
-                        "txtColor": 4278190080,  # Black
-                        "showLable": True
-                    },
-                    "textAreaData": {
-                        "isFilled": True,
-                        "fillColor": 4292927712,  # Light gray
-                        "borderType": "UNDERLINED",
-                        "storkStyle": "LINE",
-                        "dummyTxt": "Enter detailed observations and remarks",
-                        "borderColor": 4278190080,  # Black
-                        "isBold": False,
-                        "isItalic": False,
-                        "isUnderlined": False,
-                        "fontSize": 12,
-                        "txtColor": 4288585374  # Gray
-                    },
-                    "toolHeight": 100,  # Larger height for remarks
-                    "toolWidth": 1.7976931348623157e+308,
-                    "showToggle": False
-                }
-                template["pageToolsDataList"].append(remarks_tool)
+            build_tools = TOOL_BUILDERS.get(param_type)
+            if build_tools:
+                tools.extend(build_tools(param_name, display_name, option_list, spec))
             
             # Add additional remarks field if requested and not already a remarks parameter
             if include_remarks == "Yes" and param_type != "Remarks":
-                additional_remarks = {
-                    "toolId": generate_tool_id(),
-                    "toolType": "TEXTAREA",
-                    "lableData": {
-                        "text": f"{param_name} - Additional Remarks:",
-                        "isBold": False,
-                        "isItalic": True,
-                        "isUnderlined": False,
-                        "textAliend": "LEFT",
-                        "fontSize": 12,
-                        "lablePositioned": "TOP_LEFT",
-                        "spacing": 5,
-                        "txtColor": 4278190080,  # Black
-                        "showLable": True
-                    },
-                    "textAreaData": {
-                        "isFilled": True,
-                        "fillColor": 4292927712,  # Light gray
-                        "borderType": "UNDERLINED",
-                        "storkStyle": "LINE",
-                        "dummyTxt": "Additional observations or corrective actions",
-                        "borderColor": 4278190080,  # Black
-                        "isBold": False,
-                        "isItalic": False,
-                        "isUnderlined": False,
-                        "fontSize": 11,
-                        "txtColor": 4288585374  # Gray
-                    },
-                    "toolHeight": 60,
-                    "toolWidth": 1.7976931348623157e+308,
-                    "showToggle": False
-                }
-                template["pageToolsDataList"].append(additional_remarks)
-    
-    # Add final overall assessment section
-    final_assessment_header = {
-        "toolId": generate_tool_id(),
-        "toolType": "TEXT",
-        "textData": {
-            "text": "FINAL ASSESSMENT",
-            "isBold": True,
-            "isItalic": False,
-            "isUnderlined": True,
-            "textAliend": "CENTER",
-            "color": 4283215696,  # Green
-            "fontSize": 14
-        },
-        "toolHeight": 35,
-        "toolWidth": 1.7976931348623157e+308
-    }
-    template["pageToolsDataList"].append(final_assessment_header)
-    
-    # Overall quality assessment toggle
-    overall_toggle = {
-        "toolId": generate_tool_id(),
-        "toolType": "TOGGLE",
-        "toggleData": {
-            "disabledColor": 4294198070,  # Red
-            "disabledText": "REJECTED",
-            "enabledColor": 4283215696,  # Green
-            "enabledText": "APPROVED",
-            "showLabel": True,
-            "label": "Overall Quality Assessment",
-            "labelFontSize": 15,
-            "labelTextColor": 4278190080,  # Black
-            "isBold": True,
-            "isItalic": False,
-            "isSelected": True,
-            "toggleTextFontSize": 14,
-            "toggleTextIsBold": True
-        },
-        "toolWidth": 1.7976931348623157e+308,
-        "toolHeight": 100
-    }
-    template["pageToolsDataList"].append(overall_toggle)
-    
-    # Inspector signature and date
-    inspector_info = {
-        "toolId": generate_tool_id(),
-        "toolType": "TEXTAREA",
-        "lableData": {
-            "text": "Inspector Name & Signature:",
-            "isBold": True,
-            "isItalic": False,
-            "isUnderlined": False,
-            "textAliend": "LEFT",
-            "fontSize": 14,
-            "lablePositioned": "TOP_LEFT",
-            "spacing": 5,
-            "txtColor": 4278190080,  # Black
-            "showLable": True
-        },
-        "textAreaData": {
-            "isFilled": True,
-            "fillColor": 4292927712,  # Light gray
-            "borderType": "UNDERLINED",
-            "storkStyle": "LINE",
-            "dummyTxt": "Inspector name and signature",
-            "borderColor": 4278190080,  # Black
-            "isBold": False,
-            "isItalic": False,
-            "isUnderlined": False,
-            "fontSize": 12,
-            "txtColor": 4288585374  # Gray
-        },
-        "toolHeight": 80,
-        "toolWidth": 1.7976931348623157e+308,
-        "showToggle": False
-    }
-    template["pageToolsDataList"].append(inspector_info)
-    
-    # Final comprehensive remarks
-    final_remarks = {
-        "toolId": generate_tool_id(),
-        "toolType": "TEXTAREA",
-        "lableData": {
-            "text": "Final Comprehensive Remarks:",
-            "isBold": True,
-            "isItalic": False,
-            "isUnderlined": False,
-            "textAliend": "LEFT",
-            "fontSize": 14,
-            "lablePositioned": "TOP_LEFT",
-            "spacing": 5,
-            "txtColor": 4278190080,  # Black
-            "showLable": True
-        },
-        "textAreaData": {
-            "isFilled": True,
-            "fillColor": 4292927712,  # Light gray
-            "borderType": "UNDERLINED",
-            "storkStyle": "LINE",
-            "dummyTxt": "Overall assessment, corrective actions, and additional observations",
-            "borderColor": 4278190080,  # Black
-            "isBold": False,
-            "isItalic": False,
-            "isUnderlined": False,
-            "fontSize": 12,
-            "txtColor": 4288585374  # Gray
-        },
-        "toolHeight": 120,
-        "toolWidth": 1.7976931348623157e+308,
-        "showToggle": False
-    }
-    template["pageToolsDataList"].append(final_remarks)
+                additional_remarks = clone_tool(ADDITIONAL_REMARKS_TEMPLATE)
+                additional_remarks["toolId"] = generate_tool_id()
+                additional_remarks["lableData"]["text"] = f"{param_name} - Additional Remarks:"
+                tools.append(additional_remarks)
     
+    # Add final assessment header, overall toggle, inspector signature and final remarks
+    for final_tool_template in FINAL_TOOL_TEMPLATES:
+        final_tool = clone_tool(final_tool_template)
+        final_tool["toolId"] = generate_tool_id()
+        tools.append(final_tool)
+
     return template
 
 # OCR and text extraction functions
-def extract_text_from_document(filepath, file_ext):
-    """Enhanced text extraction using Azure Document Intelligence"""
+# Shared across requests so concurrent uploads cannot spawn unbounded tesseract processes
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", min(4, os.cpu_count() or 1)))
+ocr_executor = ThreadPoolExecutor(max_workers=OCR_WORKERS, thread_name_prefix="ocr")
+
+# Whole-document extraction that overlaps other request work; kept apart from ocr_executor
+# because it waits on page OCR submitted there
+DOCUMENT_WORKERS = int(os.environ.get("DOCUMENT_WORKERS", 8))
+document_executor = ThreadPoolExecutor(max_workers=DOCUMENT_WORKERS, thread_name_prefix="document")
+
+# Seconds to cache basic-OCR fallback text, so a Document Intelligence outage is not pinned for a week
+FALLBACK_OCR_CACHE_TTL = 3600
+
+def extract_text_from_document(file_data, file_ext):
+    """Extract text from uploaded file bytes, reusing cached results for identical files"""
+    cached_text = azure_cache.get_cached_ocr(file_data, file_ext)
+    if cached_text:
+        return cached_text
+    
+    extracted_text, from_document_intelligence = run_document_extraction(file_data, file_ext)
+    if extracted_text:
+        if from_document_intelligence:
+            azure_cache.cache_ocr(file_data, file_ext, extracted_text)
+        else:
+            # Basic OCR stands in while Document Intelligence is unavailable; keep it only briefly
+            azure_cache.cache_ocr(file_data, file_ext, extracted_text, ttl=FALLBACK_OCR_CACHE_TTL)
+    return extracted_text
+
+def run_document_extraction(file_data, file_ext):
+    """Enhanced text extraction from uploaded file bytes; returns (text, from_document_intelligence)"""
     try:
-        from azure_document_intelligence import azure_doc_intelligence
-        
         # Use Azure Document Intelligence for better OCR
-        extracted_data = azure_doc_intelligence.analyze_document(filepath)
+        extracted_data = azure_doc_intelligence.analyze_document_bytes(file_data)
         
         # Enhanced text with structure preservation
         enhanced_text = extracted_data["text"]
@@ -974,7 +1245,7 @@ def extract_text_from_document(filepath, file_ext):
                 enhanced_text += f"- {section['title']}\n"
         
         print(f"✅ Enhanced OCR: {len(enhanced_text)} chars, {len(extracted_data['tables'])} tables, {len(extracted_data['sections'])} sections")
-        return enhanced_text
+        return enhanced_text, True
         
     except Exception as e:
         print(f"❌ Azure Document Intelligence failed, falling back to basic OCR: {e}")
@@ -983,82 +1254,93 @@ def extract_text_from_document(filepath, file_ext):
         try:
             import fitz
             import pytesseract
+            from io import BytesIO
             from PIL import Image
             import pdf2image
             
             if file_ext == 'pdf':
-                pdf_document = fitz.open(filepath)
-                extracted_text = ""
+                pdf_document = fitz.open(stream=file_data, filetype="pdf")
+                page_texts = []
+                # Rendered pages are ~10MB+ each, so only OCR_WORKERS of them are held at once
+                pages_in_flight = threading.BoundedSemaphore(OCR_WORKERS)
                 
+                # Render scanned pages here (fitz is not thread-safe) and OCR them in the shared pool
                 for page_num in range(pdf_document.page_count):
                     page = pdf_document[page_num]
                     text = page.get_text()
                     
                     if len(text.strip()) < 100:
                         # Use OCR for scanned pages
+                        pages_in_flight.acquire()
                         mat = fitz.Matrix(3, 3)
-                        pix = page.get_pixmap(matrix=mat)
-                        img_data = pix.pil_tobytes(format="PNG")
+                        pix = page.get_pixmap(matrix=mat, alpha=False)
                         
-                        from io import BytesIO
-                        image = Image.open(BytesIO(img_data))
-                        text = pytesseract.image_to_string(image)
+                        # Hand raw RGB samples to PIL instead of a PNG encode/decode round trip
+                        image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+                        pix = None
+                        text = ocr_executor.submit(pytesseract.image_to_string, image)
+                        text.add_done_callback(lambda _: pages_in_flight.release())
+                        image = None
                     
-                    extracted_text += f"\n=== PAGE {page_num + 1} ===\n{text}\n"
+                    page_texts.append(text)
                 
                 pdf_document.close()
-                return extracted_text
+                
+                extracted_text = ""
+                for page_num, text in enumerate(page_texts):
+                    if not isinstance(text, str):
+                        text = text.result()
+                    extracted_text += f"\n=== PAGE {page_num + 1} ===\n{text}\n"
+                return extracted_text, False
             
             else:  # Image files
-                image = Image.open(filepath)
+                image = Image.open(BytesIO(file_data))
                 text = pytesseract.image_to_string(image)
-                return text
+                return text, False
                 
         except Exception as fallback_error:
             print(f"❌ Fallback OCR also failed: {fallback_error}")
-            return None
+            return None, False
+
+
+# Section headings and parameter-value pairs preserved in OCR text
+SECTION_HEADING_RE = re.compile(
+    r'(ORGANOLEPTIC\s+EVALUATION|COOKING\s+DETAILS|PACKAGING\s*&\s*FREEZING|FREEZING\s+DETAILS'
+    r'|METAL\s+SCREENING|SIZE\s+VARIATIONS|COLOUR\s+VARIATIONS|EVALUATION\s+OF\s+PASTRY|FINAL\s+ASSESSMENT)',
+    re.IGNORECASE
+)
+
+PARAM_VALUE_PATTERNS = [
+    (re.compile(r'([A-Za-z\s]+):\s*(Acceptable|Non-acceptable|Present|Absent|To be mentioned)', re.IGNORECASE), r'**\1**: \2'),
+    (re.compile(r'([A-Za-z\s]+)\s+(Sam\s+\d+)', re.IGNORECASE), r'**\1** - \2'),
+    (re.compile(r'(Temperature|Weight|Time|Dimension[s]?)[:\s]+([0-9\-\+\±°C\s\w]+)', re.IGNORECASE), r'**\1**: \2'),
+]
+
+EXTRA_BLANK_LINES_RE = re.compile(r'\n\s*\n\s*\n')
+# Only tabs and multi-character runs need rewriting; single spaces are left in place
+INLINE_WHITESPACE_RE = re.compile(r'[ \t]{2,}|\t')
+
 def enhance_table_structure(text):
     """Enhance text to better preserve table structures and headings"""
     if not text:
         return text
     
-    # Preserve important section headings
-    section_patterns = [
-        (r'(ORGANOLEPTIC\s+EVALUATION)', r'\n## \1\n'),
-        (r'(COOKING\s+DETAILS)', r'\n## \1\n'),
-        (r'(PACKAGING\s*&\s*FREEZING)', r'\n## \1\n'),
-        (r'(FREEZING\s+DETAILS)', r'\n## \1\n'),
-        (r'(METAL\s+SCREENING)', r'\n## \1\n'),
-        (r'(SIZE\s+VARIATIONS)', r'\n## \1\n'),
-        (r'(COLOUR\s+VARIATIONS)', r'\n## \1\n'),
-        (r'(EVALUATION\s+OF\s+PASTRY)', r'\n## \1\n'),
-        (r'(FINAL\s+ASSESSMENT)', r'\n## \1\n'),
-    ]
-    
-    processed_text = text
-    for pattern, replacement in section_patterns:
-        processed_text = re.sub(pattern, replacement, processed_text, flags=re.IGNORECASE)
+    # Preserve important section headings (single pass over the text)
+    processed_text = SECTION_HEADING_RE.sub(r'\n## \1\n', text)
     
     # Preserve parameter-value pairs
-    param_patterns = [
-        (r'([A-Za-z\s]+):\s*(Acceptable|Non-acceptable|Present|Absent|To be mentioned)', r'**\1**: \2'),
-        (r'([A-Za-z\s]+)\s+(Sam\s+\d+)', r'**\1** - \2'),
-        (r'(Temperature|Weight|Time|Dimension[s]?)[:\s]+([0-9\-\+\±°C\s\w]+)', r'**\1**: \2'),
-    ]
-    
-    for pattern, replacement in param_patterns:
-        processed_text = re.sub(pattern, replacement, processed_text, flags=re.IGNORECASE)
+    for pattern, replacement in PARAM_VALUE_PATTERNS:
+        processed_text = pattern.sub(replacement, processed_text)
     
     # Clean up excessive whitespace while preserving structure
-    processed_text = re.sub(r'\n\s*\n\s*\n', '\n\n', processed_text)
-    processed_text = re.sub(r'[ \t]+', ' ', processed_text)
+    processed_text = EXTRA_BLANK_LINES_RE.sub('\n\n', processed_text)
+    processed_text = INLINE_WHITESPACE_RE.sub(' ', processed_text)
     
     return processed_text
 
 def extract_metadata_from_ocr(ocr_text, filename=""):
     """Enhanced metadata extraction"""
     try:
-        from azure_document_intelligence import azure_doc_intelligence
         return azure_doc_intelligence.extract_enhanced_metadata(ocr_text, filename)
     except:
         # Fallback to basic extraction
@@ -1073,18 +1355,43 @@ def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+# Shared session so outbound fetches reuse pooled keep-alive connections
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=2))
+
 def fetch_json_from_firebase(firebase_json_url):
     """Fetch JSON template from Firebase Storage URL"""
     try:
-        response = requests.get(firebase_json_url)
+        response = http_session.get(firebase_json_url, timeout=10)
         if response.status_code == 200:
-            return response.json()
+            return json_loads(response.content)
         else:
             return None
     except Exception as e:
         print(f"Error fetching JSON from Firebase: {str(e)}")
         return None
 
+# One Blob Storage client for all uploads, sharing a pooled keep-alive session
+blob_http_session = requests.Session()
+blob_http_session.mount("https://", HTTPAdapter(pool_connections=50, pool_maxsize=50))
+
+@lru_cache(maxsize=None)
+def get_blob_service():
+    """Get the shared Blob Storage client, built on first upload so startup does not need the secret"""
+    return BlobServiceClient.from_connection_string(
+        get_blob_connection(),
+        transport=RequestsTransport(session=blob_http_session, session_owner=False)
+    )
+
+# Writes that only depend on an existing request id; save_parameters fans out on its own pool,
+# so these are kept apart from cosmos_db.write_pool
+PERSIST_WORKERS = int(os.environ.get("PERSIST_WORKERS", 8))
+persist_executor = ThreadPoolExecutor(max_workers=PERSIST_WORKERS, thread_name_prefix="persist")
+
+# Independent Cosmos reads issued side by side within a single request
+READ_WORKERS = int(os.environ.get("READ_WORKERS", 8))
+read_executor = ThreadPoolExecutor(max_workers=READ_WORKERS, thread_name_prefix="read")
+
 # API Routes
 @app.route("/")
 def index():
@@ -1168,13 +1475,10 @@ def index():
 @audit_log("CREATE", "TEMPLATE", lambda result, *args, **kwargs: result.json.get('request_id') if hasattr(result, 'json') else 'unknown')
 def refine_parameters():
     """refine endpoint with comprehensive RAG, intelligent parameter generation, and Event Grid notifications"""
-    global global_parameters
-    global global_json_template
 
     print(">> /refine route called <<")
     
     # Track request start time
-    import time
     request_start_time = time.time()
 
     # Handle both form data and JSON
@@ -1194,15 +1498,8 @@ def refine_parameters():
             filename = secure_filename(uploaded_file.filename)
             file_ext = filename.rsplit('.', 1)[1].lower()
             
-            temp_dir = tempfile.mkdtemp()
-            filepath = os.path.join(temp_dir, filename)
-            uploaded_file.save(filepath)
-            
             # text extraction
-            extracted_text = extract_text_from_document(filepath, file_ext)
-            
-            os.unlink(filepath)
-            os.rmdir(temp_dir)
+            extracted_text = extract_text_from_document(uploaded_file.read(), file_ext)
             
             if extracted_text:
                 file_context = f"\n\nReference document content ({filename}):\n{extracted_text}"
@@ -1252,10 +1549,7 @@ def refine_parameters():
             is_digitization=False
         )
 
-        print("\n🎯 LLM RESPONSE:")
-        print("=" * 50)
-        print(llm_response[:500] + "..." if len(llm_response) > 500 else llm_response)
-        print("=" * 50)
+        print_llm_response("LLM RESPONSE", llm_response)
 
         # Parse response with handling
         summary_text, changes_list = parse_llm_changes(llm_response)
@@ -1265,7 +1559,6 @@ def refine_parameters():
         
         # Apply changes with parameter handling
         updated_params = apply_changes_to_params([], changes_list)
-        global_parameters = updated_params
         
         print(f"✅ Generated {len(updated_params)} parameters")
         
@@ -1278,17 +1571,16 @@ def refine_parameters():
             supplier_name=supplier_name,
             parameters=updated_params
         )
-        global_json_template = json_template
         
         # Store JSON template
         cosmos_db.save_json_template(request_id, json_template)
+        cosmos_db.set_parameter_count(request_id, len(updated_params))
         
         # Calculate processing time
         processing_time_ms = (time.time() - request_start_time) * 1000
         
         # 🚀 NEW: Send Event Grid notification for template generation
         try:
-            from event_grid_integration import working_event_handler
             event_sent = working_event_handler.send_template_generated_event(
                 request_id=request_id,
                 product_name=product_name,
@@ -1329,7 +1621,6 @@ def refine_parameters():
         
         # 🚀 NEW: Send Event Grid error notification
         try:
-            from event_grid_integration import working_event_handler
             working_event_handler.send_error_event(
                 endpoint="/refine",
                 error_type=type(e).__name__,
@@ -1356,8 +1647,6 @@ def refine_parameters():
 @audit_log("UPDATE", "TEMPLATE", lambda result, *args, **kwargs: result.json.get('request_id') if hasattr(result, 'json') else 'unknown')
 def edit_parameters():
     """edit endpoint with comprehensive context and intelligent optimization - NOW ACCEPTS JSON FILE"""
-    global global_parameters
-    global global_json_template
 
     print(">> /edit route called <<")
 
@@ -1368,28 +1657,15 @@ def edit_parameters():
             "user_message": request.form.get("user_message", "")
         }
             
-        # Handle context file upload with OCR
+        # Handle context file upload with OCR, extracted while the existing template is loaded
         uploaded_file = request.files.get('context_file')
-        file_context = ""
+        context_future = None
         
         if uploaded_file and allowed_file(uploaded_file.filename):
             filename = secure_filename(uploaded_file.filename)
             file_ext = filename.rsplit('.', 1)[1].lower()
             
-            temp_dir = tempfile.mkdtemp()
-            filepath = os.path.join(temp_dir, filename)
-            uploaded_file.save(filepath)
-            
-            extracted_text = extract_text_from_document(filepath, file_ext)
-            
-            os.unlink(filepath)
-            os.rmdir(temp_dir)
-            
-            if extracted_text:
-                file_context = f"\n\nReference document content ({filename}):\n{extracted_text}"
-                print(f"✅ OCR extracted {len(extracted_text)} characters from {filename}")
-            else:
-                file_context = f"\n\n[Failed to extract text from {filename}]"
+            context_future = document_executor.submit(extract_text_from_document, uploaded_file.read(), file_ext)
 
         # Handle JSON template file upload
         json_template_file = request.files.get('json_template_file')
@@ -1397,8 +1673,7 @@ def edit_parameters():
         
         if json_template_file and json_template_file.filename.endswith('.json'):
             try:
-                json_content = json_template_file.read().decode('utf-8')
-                json_template_data = json.loads(json_content)
+                json_template_data = json_loads(json_template_file.read())
                 print(f"✅ JSON template file loaded: {json_template_file.filename}")
             except Exception as e:
                 print(f"❌ Error loading JSON file: {str(e)}")
@@ -1408,7 +1683,7 @@ def edit_parameters():
         data = request.get_json()
         if not data:
             return jsonify({"error": "No JSON payload found"}), 400
-        file_context = ""
+        context_future = None
         json_template_data = data.get("json_template_data")  # For direct JSON payload
 
     # Validate required fields
@@ -1421,10 +1696,6 @@ def edit_parameters():
     if not request_id and not json_template_data:
         return jsonify({"error": "Either request_id or json_template_file is required"}), 400
     
-    # Add file context to user message if available
-    if file_context:
-        user_message += file_context
-
     try:
         existing_parameters = []
         doc_type = ""
@@ -1433,39 +1704,17 @@ def edit_parameters():
         
         if request_id:
             # Get original request data from Cosmos DB
-            query = "SELECT * FROM c WHERE c.id = @request_id"
-            items = list(cosmos_db.qc_requests.query_items(
-                query=query,
-                parameters=[{"name": "@request_id", "value": request_id}]
-            ))
+            original_data = cosmos_db.get_request_by_id(request_id)
             
-            if not items:
+            if not original_data:
                 return jsonify({"error": f"Request ID {request_id} not found"}), 404
             
-            original_data = items[0]
             doc_type = original_data["doc_type"]
             product_name = original_data["product_name"] 
             supplier_name = original_data["supplier_name"]
             
-            # Get existing parameters from Cosmos DB
-            param_query = "SELECT * FROM c WHERE c.request_id = @request_id"
-            param_items = list(cosmos_db.parameters.query_items(
-                query=param_query,
-                parameters=[{"name": "@request_id", "value": request_id}]
-            ))
-            
-            existing_parameters = [
-                {
-                    "Parameter": item["parameter_name"], 
-                    "Type": item["type"], 
-                    "Spec": item["spec"], 
-                    "DropdownOptions": item["dropdown_options"], 
-                    "IncludeRemarks": item["include_remarks"],
-                    "Section": item["section"],
-                    "ClauseReference": item["clause_reference"]
-                } 
-                for item in param_items
-            ]
+            # Get existing parameters from Cosmos DB, already keyed as template parameters
+            existing_parameters = cosmos_db.get_parameter_list_by_request_id(request_id)
             
         elif json_template_data:
             # JSON template processing
@@ -1474,78 +1723,16 @@ def edit_parameters():
             # parameter extraction from JSON template
             existing_parameters = []
             
+            # Parse parameters and pick up the first heading and supplier line in one pass
+            heading_found = False
+            supplier_found = False
             for tool in template_data.get("pageToolsDataList", []):
                 tool_type = tool.get("toolType", "")
-                
-                if tool_type == "DROPDOWN":
-                    dropdown_data = tool.get("dropdownData", {})
-                    existing_parameters.append({
-                        "Parameter": dropdown_data.get("labelText", "Dropdown Field"),
-                        "Type": "Dropdown",
-                        "Spec": "",
-                        "DropdownOptions": ", ".join(dropdown_data.get("optionLst", [])),
-                        "IncludeRemarks": "No",
-                        "Section": "General",
-                        "ClauseReference": ""
-                    })
-                elif tool_type == "CHECKBOX":
-                    checkbox_data = tool.get("checkboxData", {})
-                    existing_parameters.append({
-                        "Parameter": "Checklist Group",
-                        "Type": "Checklist",
-                        "Spec": "",
-                        "DropdownOptions": ", ".join(checkbox_data.get("labelLst", [])),
-                        "IncludeRemarks": "No",
-                        "Section": "General",
-                        "ClauseReference": ""
-                    })
-                elif tool_type == "IMAGE":
-                    image_data = tool.get("imageLableData", {})
-                    existing_parameters.append({
-                        "Parameter": image_data.get("text", "Image Upload").replace(":", ""),
-                        "Type": "Image Upload",
-                        "Spec": "Visual inspection with photo evidence",
-                        "DropdownOptions": "",
-                        "IncludeRemarks": "Yes",
-                        "Section": "Visual Inspection",
-                        "ClauseReference": ""
-                    })
-                elif tool_type == "TOGGLE":
-                    toggle_data = tool.get("toggleData", {})
-                    existing_parameters.append({
-                        "Parameter": toggle_data.get("label", "Toggle Assessment"),
-                        "Type": "Toggle",
-                        "Spec": "",
-                        "DropdownOptions": f"{toggle_data.get('enabledText', 'Yes')}, {toggle_data.get('disabledText', 'No')}",
-                        "IncludeRemarks": "No",
-                        "Section": "Assessment",
-                        "ClauseReference": ""
-                    })
-                elif tool_type == "TEXTAREA":
-                    label_data = tool.get("lableData", {})
-                    text_area_data = tool.get("textAreaData", {})
-                    label_text = label_data.get("text", "").replace(":", "")
-                    
-                    if "Remarks" in label_text or "remarks" in text_area_data.get("dummyTxt", ""):
-                        param_type = "Remarks"
-                    elif "numeric" in text_area_data.get("dummyTxt", "").lower():
-                        param_type = "Numeric Input"
-                    else:
-                        param_type = "Text Input"
-                        
-                    existing_parameters.append({
-                        "Parameter": label_text,
-                        "Type": param_type,
-                        "Spec": "",
-                        "DropdownOptions": "",
-                        "IncludeRemarks": "No",
-                        "Section": "General",
-                        "ClauseReference": ""
-                    })
-                    
-            # Extract basic info from template
-            for tool in template_data.get("pageToolsDataList", []):
-                if tool.get("toolType") == "HEADING":
+                parse_tool = TEMPLATE_TOOL_PARSERS.get(tool_type)
+                if parse_tool:
+                    existing_parameters.append(parse_tool(tool))
+                elif tool_type == "HEADING" and not heading_found:
+                    heading_found = True
                     title_text = tool.get("textData", {}).get("text", "")
                     parts = title_text.split(" ", 1)
                     if len(parts) >= 2:
@@ -1554,24 +1741,29 @@ def edit_parameters():
                     else:
                         product_name = title_text
                         doc_type = "Inspection Document"
-                    break
+                elif tool_type == "TEXT" and not supplier_found:
+                    text = tool.get("textData", {}).get("text", "")
+                    if "Supplier" in text:
+                        supplier_found = True
+                        supplier_name = text.replace("Supplier Name:", "").strip()
                     
             if not product_name:
                 product_name = "Product"
             if not doc_type:
                 doc_type = "Inspection Document"
                 
-            # Find supplier info
-            for tool in template_data.get("pageToolsDataList", []):
-                if tool.get("toolType") == "TEXT":
-                    text = tool.get("textData", {}).get("text", "")
-                    if "Supplier" in text:
-                        supplier_name = text.replace("Supplier Name:", "").strip()
-                        break
-                        
             if not supplier_name:
                 supplier_name = "Unknown Supplier"
         
+        # Add file context to user message if available
+        if context_future:
+            extracted_text = context_future.result()
+            if extracted_text:
+                user_message += f"\n\nReference document content ({filename}):\n{extracted_text}"
+                print(f"✅ OCR extracted {len(extracted_text)} characters from {filename}")
+            else:
+                user_message += f"\n\n[Failed to extract text from {filename}]"
+        
         # Create new version in Cosmos DB
         created_id = cosmos_db.create_qc_request(doc_type, product_name, supplier_name, user_message)
         print(f"✅ Created edit version with ID: {created_id}")
@@ -1587,24 +1779,20 @@ def edit_parameters():
             is_digitization=False
         )
 
-        print(f"\n🎯 EDIT LLM RESPONSE:")
-        print("=" * 50)
-        print(llm_response[:500] + "..." if len(llm_response) > 500 else llm_response)
-        print("=" * 50)
+        print_llm_response("EDIT LLM RESPONSE", llm_response)
 
         # Parse and apply changes with handling
         summary_text, changes_list = parse_llm_changes(llm_response)
         
-        # Store LLM response in Cosmos DB
-        cosmos_db.save_llm_response(created_id, llm_response, summary_text)
+        # Store LLM response in Cosmos DB (writes run concurrently and are awaited below)
+        pending_writes = [persist_executor.submit(cosmos_db.save_llm_response, created_id, llm_response, summary_text)]
         
         updated_params = apply_changes_to_params(existing_parameters, changes_list)
-        global_parameters = updated_params
         
         print(f"✅ edit generated {len(updated_params)} optimized parameters")
         
         # Store parameters in Cosmos DB
-        cosmos_db.save_parameters(created_id, updated_params)
+        pending_writes.append(persist_executor.submit(cosmos_db.save_parameters, created_id, updated_params))
         
         # Generate JSON template  
         json_template = generate_json_template(
@@ -1613,10 +1801,14 @@ def edit_parameters():
             supplier_name=supplier_name,
             parameters=updated_params
         )
-        global_json_template = json_template
         
         # Store JSON template in Cosmos DB
-        cosmos_db.save_json_template(created_id, json_template)
+        pending_writes.append(persist_executor.submit(cosmos_db.save_json_template, created_id, json_template))
+        for write in pending_writes:
+            write.result()
+        
+        # Marks the request complete, which lets its preview be cached
+        cosmos_db.set_parameter_count(created_id, len(updated_params))
         
         response_data = {
             "success": True, 
@@ -1636,7 +1828,7 @@ def edit_parameters():
             response_data["original_request_id"] = request_id
         if json_template_data:
             response_data["json_template_processed"] = True
-        if file_context:
+        if context_future:
             response_data["file_info"] = f"OCR processed {filename}" if 'filename' in locals() else "File processed with OCR"
             
         return jsonify(response_data)
@@ -1670,22 +1862,17 @@ def digitize_checklist():
     
     try:
         filename = secure_filename(file.filename)
-        temp_dir = tempfile.mkdtemp()
-        filepath = os.path.join(temp_dir, filename)
-        file.save(filepath)
 
         # text extraction with table structure preservation
         file_ext = filename.rsplit('.', 1)[1].lower()
-        extracted_text = extract_text_from_document(filepath, file_ext)
-
-        os.unlink(filepath)
-        os.rmdir(temp_dir)
+        extracted_text = extract_text_from_document(file.read(), file_ext)
 
         if not extracted_text:
             return jsonify({"error": "Failed to extract text from file"}), 500
 
         print(f"✅ OCR extracted {len(extracted_text)} characters from {filename}")
-        print(f"📄 Preview: {extracted_text[:300]}...")
+        if app.debug:
+            print(f"📄 Preview: {extracted_text[:300]}...")
 
         # metadata extraction
         if not doc_type or not product_name or not supplier_name:
@@ -1728,10 +1915,7 @@ Focus on creating a PROFESSIONAL, COMPREHENSIVE parameter set that maintains the
             is_digitization=True
         )
         
-        print(f"\n🎯 DIGITIZATION LLM RESPONSE:")
-        print("=" * 50)
-        print(llm_response[:500] + "..." if len(llm_response) > 500 else llm_response)
-        print("=" * 50)
+        print_llm_response("DIGITIZATION LLM RESPONSE", llm_response)
         
         # Parse parameters with handling
         json_array_text = extract_top_level_json_array(llm_response)
@@ -1739,7 +1923,7 @@ Focus on creating a PROFESSIONAL, COMPREHENSIVE parameter set that maintains the
         
         if json_array_text:
             try:
-                parameters = json.loads(json_array_text)
+                parameters = json_loads(json_array_text)
                 # parameter processing
                 processed_params = []
                 for param in parameters:
@@ -1759,11 +1943,11 @@ Focus on creating a PROFESSIONAL, COMPREHENSIVE parameter set that maintains the
         # Save to Cosmos DB
         request_id = cosmos_db.create_qc_request(doc_type, product_name, supplier_name)
         
-        # Store LLM response
-        cosmos_db.save_llm_response(request_id, llm_response, f"digitization: {len(parameters)} comprehensive parameters extracted from {filename}")
+        # Store LLM response (writes run concurrently and are awaited below)
+        pending_writes = [persist_executor.submit(cosmos_db.save_llm_response, request_id, llm_response, f"digitization: {len(parameters)} comprehensive parameters extracted from {filename}")]
         
         # Store parameters
-        cosmos_db.save_parameters(request_id, parameters)
+        pending_writes.append(persist_executor.submit(cosmos_db.save_parameters, request_id, parameters))
         
         # Generate JSON template
         json_template = generate_json_template(
@@ -1774,7 +1958,12 @@ Focus on creating a PROFESSIONAL, COMPREHENSIVE parameter set that maintains the
         )
         
         # Store JSON template
-        cosmos_db.save_json_template(request_id, json_template)
+        pending_writes.append(persist_executor.submit(cosmos_db.save_json_template, request_id, json_template))
+        for write in pending_writes:
+            write.result()
+        
+        # Marks the request complete, which lets its preview be cached
+        cosmos_db.set_parameter_count(request_id, len(parameters))
         
         # response data
         response_data = {
@@ -1804,7 +1993,6 @@ Focus on creating a PROFESSIONAL, COMPREHENSIVE parameter set that maintains the
         
     except Exception as e:
         print(f"❌ Error in /digitize: {str(e)}")
-        import traceback
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
@@ -1817,22 +2005,18 @@ def view_history():
             # Get all requests from Cosmos DB
             requests = cosmos_db.get_all_requests()
             
+            # Count parameters for all requests at once
+            parameter_counts = cosmos_db.get_parameter_counts()
+            
             result = []
             for req in requests:
-                # Count parameters for each request
-                param_query = "SELECT * FROM c WHERE c.request_id = @request_id"
-                param_items = list(cosmos_db.parameters.query_items(
-                    query=param_query,
-                    parameters=[{"name": "@request_id", "value": req["id"]}]
-                ))
-                
                 result.append({
                     "id": req["id"],
                     "doc_type": req["doc_type"],
                     "product_name": req["product_name"],
                     "supplier_name": req["supplier_name"],
                     "created_at": req["created_at"],
-                    "parameter_count": len(param_items)
+                    "parameter_count": parameter_counts.get(req["id"], 0)
                 })
             
             # Sort by created_at descending
@@ -1847,28 +2031,24 @@ def view_history():
         # Get all requests from Cosmos DB
         requests = cosmos_db.get_all_requests()
         
+        # Count parameters for all requests at once
+        parameter_counts = cosmos_db.get_parameter_counts()
+        
         rows = []
         for req in requests:
-            # Count parameters for each request
-            param_query = "SELECT * FROM c WHERE c.request_id = @request_id"
-            param_items = list(cosmos_db.parameters.query_items(
-                query=param_query,
-                parameters=[{"name": "@request_id", "value": req["id"]}]
-            ))
-            
             rows.append((
                 req["id"],
                 req["doc_type"],
                 req["product_name"],
                 req["supplier_name"],
                 req["created_at"],
-                len(param_items)
+                parameter_counts.get(req["id"], 0)
             ))
         
         # Sort by created_at descending
         rows.sort(key=lambda x: x[4], reverse=True)
         
-        html = """
+        html_parts = ["""
         <html>
         <head>
             <title>QC Request History</title>
@@ -1938,13 +2118,13 @@ def view_history():
                         <th>Created</th>
                         <th>Actions</th>
                     </tr>
-        """
+        """]
         
         for row in rows:
             param_badge = "🎯" if row[5] >= 15 else "⚠️" if row[5] >= 10 else "❌"
             clean_product_name = row[2].replace(' ', '_').replace(',', '').replace('(', '').replace(')', '')
             
-            html += f"""
+            html_parts.append(f"""
                 <tr>
                     <td>{row[0][:8]}...</td>
                     <td><strong>{row[2]}</strong></td>
@@ -1960,9 +2140,9 @@ def view_history():
                         </button>
                     </td>
                 </tr>
-            """
+            """)
         
-        html += """
+        html_parts.append("""
                 </table>
                 <div style="margin-top: 20px; padding: 15px; background: #e8f5e8; border-radius: 5px;">
                     <strong>Legend:</strong> 
@@ -1976,8 +2156,8 @@ def view_history():
             </div>
         </body>
         </html>
-        """
-        return html
+        """)
+        return "".join(html_parts)
         
     except Exception as e:
         return f"<h1>Error</h1><p>{str(e)}</p>", 500
@@ -1988,8 +2168,6 @@ def view_history():
 def debug_audit():
     """Debug audit logging"""
     try:
-        from audit_logger import audit_logger
-        
         # Manual audit log test
         audit_logger.log_event(
             event_type="DEBUG_TEST",
@@ -2010,8 +2188,6 @@ def debug_audit():
 def debug_audit_check():
     """Check audit logs container"""
     try:
-        from audit_logger import audit_logger
-        
         # Get raw data from container
         query = "SELECT * FROM c ORDER BY c.timestamp DESC"
         items = list(audit_logger.container.query_items(
@@ -2027,7 +2203,6 @@ def debug_audit_check():
         })
         
     except Exception as e:
-        import traceback
         return jsonify({
             "error": str(e),
             "traceback": traceback.format_exc()
@@ -2059,176 +2234,24 @@ def clear_cache():
 def get_template_json(request_id):
     """Get template JSON by request ID"""
     try:
-        template_data = cosmos_db.get_template_by_request_id(str(request_id))
+        template_body = azure_cache.get_cached_template(request_id)
         
-        if template_data:
-            return jsonify(template_data)
-        else:
-            return jsonify({"error": f"template not found for request ID {request_id}"}), 404
+        if not template_body:
+            template_data = cosmos_db.get_template_by_request_id(str(request_id))
+            if not template_data:
+                return jsonify({"error": f"template not found for request ID {request_id}"}), 404
+            
+            template_body = app.json.dumps(template_data, separators=(",", ":"))
+            azure_cache.cache_template(request_id, template_body)
+        
+        return template_json_response(template_body)
             
     except Exception as e:
         print(f"❌ Error in /template/{request_id}: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route("/preview/<request_id>", methods=["GET"])
-def preview_page(request_id):
-    """preview with better formatting and metadata"""
-    try:
-        # Get template JSON from Cosmos DB
-        template_data = cosmos_db.get_template_by_request_id(str(request_id))
-        
-        # Get parameters from Cosmos DB
-        param_query = "SELECT * FROM c WHERE c.request_id = @request_id"
-        param_items = list(cosmos_db.parameters.query_items(
-            query=param_query,
-            parameters=[{"name": "@request_id", "value": str(request_id)}]
-        ))
-        
-        # Convert to tuple format for existing code
-        parameters = [
-            (
-                item["parameter_name"],
-                item["type"],
-                item["spec"],
-                item["dropdown_options"],
-                item["include_remarks"],
-                item["section"],
-                item["clause_reference"]
-            ) for item in param_items
-        ]
-        
-        # Get request details from Cosmos DB
-        req_query = "SELECT * FROM c WHERE c.id = @request_id"
-        req_items = list(cosmos_db.qc_requests.query_items(
-            query=req_query,
-            parameters=[{"name": "@request_id", "value": str(request_id)}]
-        ))
-        
-        if req_items:
-            req = req_items[0]
-            request_details = (req["doc_type"], req["product_name"], req["supplier_name"])
-        else:
-            request_details = None
-        
-        if not template_data:
-            return f"""
-            <html>
-            <head><title>Not Found</title></head>
-            <body>
-                <h1>Template not found</h1>
-                <p>No template exists for request ID {request_id}</p>
-                <a href="/history">View History</a>
-            </body>
-            </html>
-            """, 404
-            
-        json_template = template_data
-        
-        # Generate ASCII preview with sections
-        ascii_preview = "╔══════════════════════════════════════════════════════════════════════╗\n"
-        
-        if request_details:
-            header = f"{request_details[1]} {request_details[0]}"
-        else:
-            header = "QC Template"
-        
-        header_padding = (70 - len(header)) // 2
-        ascii_preview += f"║{' ' * header_padding}{header}{' ' * (70 - header_padding - len(header))}║\n"
-        
-        if request_details and request_details[2]:
-            supplier = f"Supplier: {request_details[2]}"
-            supplier_padding = (70 - len(supplier)) // 2
-            ascii_preview += f"║{' ' * supplier_padding}{supplier}{' ' * (70 - supplier_padding - len(supplier))}║\n"
-            
-        ascii_preview += "╚══════════════════════════════════════════════════════════════════════╝\n\n"
-        
-        # Group parameters by section
-        sections = {}
-        for param in parameters:
-            param_name, param_type, spec, options, include_remarks, section, clause_ref = param
-            section = section or "General Parameters"
-            if section not in sections:
-                sections[section] = []
-            sections[section].append(param)
-        
-        # Add parameters organized by sections
-        for section_name, section_params in sections.items():
-            ascii_preview += f"\n🔹 {section_name.upper()}\n"
-            ascii_preview += "─" * 60 + "\n"
-            
-            for param in section_params:
-                param_name, param_type, spec, options, include_remarks, section, clause_ref = param
-                
-                # Add clause reference if available
-                display_name = param_name
-                if clause_ref:
-                    display_name += f" ({clause_ref})"
-                
-                if param_type == "Image Upload":
-                    ascii_preview += f"[📷] {display_name}: [ Upload Photo ] + Toggle Assessment\n"
-                elif param_type == "Toggle":
-                    ascii_preview += f"[◐] {display_name}: ● Acceptable ○ Not Acceptable\n"
-                elif param_type == "Dropdown":
-                    ascii_preview += f"[▼] {display_name}: _________________ "
-                    if options:
-                        option_list = [opt.strip() for opt in options.split(",")[:3]]
-                        ascii_preview += f"({', '.join(option_list)}{'...' if len(options.split(',')) > 3 else ''})\n"
-                    else:
-                        ascii_preview += "\n"
-                elif param_type == "Checklist":
-                    ascii_preview += f"    {display_name}:\n"
-                    if options:
-                        option_list = [opt.strip() for opt in options.split(",")]
-                        for opt in option_list[:5]:
-                            ascii_preview += f"    ☐ {opt}\n"
-                        if len(option_list) > 5:
-                            ascii_preview += f"    ... and {len(option_list) - 5} more items\n"
-                    else:
-                        ascii_preview += "    ☐ Item 1\n"
-                elif param_type == "Numeric Input":
-                    ascii_preview += f"[#️⃣] {display_name}: _____________"
-                    if spec:
-                        ascii_preview += f" (Spec: {spec})\n"
-                    else:
-                        ascii_preview += "\n"
-                elif param_type == "Text Input":
-                    ascii_preview += f"[✏️] {display_name}: _____________________________\n"
-                elif param_type == "Remarks":
-                    ascii_preview += f"[📝] {display_name}:\n"
-                    ascii_preview += "    ┌─────────────────────────────────────┐\n"
-                    ascii_preview += "    │                                     │\n"
-                    ascii_preview += "    │                                     │\n"
-                    ascii_preview += "    └─────────────────────────────────────┘\n"
-                
-                if include_remarks == "Yes" and param_type != "Remarks":
-                    ascii_preview += f"    └─ Additional Remarks: _______________________\n"
-                
-                ascii_preview += "\n"
-        
-        # Add final assessment
-        ascii_preview += "═" * 70 + "\n"
-        ascii_preview += "🎯 FINAL ASSESSMENT\n"
-        ascii_preview += "═" * 70 + "\n"
-        ascii_preview += "[✅] Overall Quality Assessment: ● APPROVED ○ REJECTED\n\n"
-        ascii_preview += "[👤] Inspector Name & Signature: _________________________________\n\n"
-        ascii_preview += "[📝] Final Comprehensive Remarks:\n"
-        ascii_preview += "    ┌─────────────────────────────────────────────────────────────┐\n"
-        ascii_preview += "    │ Overall assessment, corrective actions, and observations    │\n"
-        ascii_preview += "    │                                                             │\n"
-        ascii_preview += "    │                                                             │\n"
-        ascii_preview += "    └─────────────────────────────────────────────────────────────┘\n"
-        
-        # statistics
-        total_params = len(parameters)
-        param_types = {}
-        sections_count = len(sections)
-        regulatory_refs = sum(1 for param in parameters if param[6])  # clause references
-        
-        for param in parameters:
-            param_type = param[1]
-            param_types[param_type] = param_types.get(param_type, 0) + 1
-        
-        html = f"""
+# Static preview page; filled in with str.format (CSS/JS braces are doubled)
+PREVIEW_HTML_TEMPLATE = """
         <html>
         <head>
             <title> QC Template Preview - Request #{request_id}</title>
@@ -2297,7 +2320,7 @@ def preview_page(request_id):
                 .button-group {{ margin: 25px 0; text-align: center; }}
                 .badge {{ background: #28a745; color: white; padding: 4px 8px; border-radius: 12px; font-size: 12px; margin-left: 10px; }}
                 .quality-badge {{ 
-                    background: {'#28a745' if total_params >= 15 else '#ffc107' if total_params >= 10 else '#dc3545'};
+                    background: {quality_color};
                     color: white;
                     padding: 6px 12px;
                     border-radius: 15px;
@@ -2324,7 +2347,7 @@ def preview_page(request_id):
                         <button onclick="downloadJson()">💾 Download JSON</button>
                     </div>
                     <div id="jsonSection" class="json-section" style="display: none;">
-                        <pre id="jsonContent">{json.dumps(json_template, indent=2)}</pre>
+                        <pre id="jsonContent">{template_json}</pre>
                     </div>
                 </div>
                 
@@ -2363,6 +2386,207 @@ def preview_page(request_id):
         </body>
         </html>
         """
+
+ASCII_BOX_TOP = "╔" + "═" * 70 + "╗\n"
+ASCII_BOX_BOTTOM = "╚" + "═" * 70 + "╝\n\n"
+ASCII_SECTION_RULE = "─" * 60 + "\n"
+ASCII_REMARKS_BOX = (
+    "    ┌─────────────────────────────────────┐\n"
+    "    │                                     │\n"
+    "    │                                     │\n"
+    "    └─────────────────────────────────────┘\n"
+)
+ASCII_FINAL_ASSESSMENT = (
+    "═" * 70 + "\n"
+    "🎯 FINAL ASSESSMENT\n"
+    + "═" * 70 + "\n"
+    "[✅] Overall Quality Assessment: ● APPROVED ○ REJECTED\n\n"
+    "[👤] Inspector Name & Signature: _________________________________\n\n"
+    "[📝] Final Comprehensive Remarks:\n"
+    "    ┌─────────────────────────────────────────────────────────────┐\n"
+    "    │ Overall assessment, corrective actions, and observations    │\n"
+    "    │                                                             │\n"
+    "    │                                                             │\n"
+    "    └─────────────────────────────────────────────────────────────┘\n"
+)
+
+def render_image_param(display_name, spec, options):
+    """ASCII preview lines for an Image Upload parameter"""
+    return [f"[📷] {display_name}: [ Upload Photo ] + Toggle Assessment\n"]
+
+def render_toggle_param(display_name, spec, options):
+    """ASCII preview lines for a Toggle parameter"""
+    return [f"[◐] {display_name}: ● Acceptable ○ Not Acceptable\n"]
+
+def render_dropdown_param(display_name, spec, options):
+    """ASCII preview lines for a Dropdown parameter"""
+    if options:
+        all_options = options.split(",")
+        option_list = [opt.strip() for opt in all_options[:3]]
+        return [f"[▼] {display_name}: _________________ ({', '.join(option_list)}{'...' if len(all_options) > 3 else ''})\n"]
+    return [f"[▼] {display_name}: _________________ \n"]
+
+def render_checklist_param(display_name, spec, options):
+    """ASCII preview lines for a Checklist parameter"""
+    lines = [f"    {display_name}:\n"]
+    if options:
+        option_list = [opt.strip() for opt in options.split(",")]
+        for opt in option_list[:5]:
+            lines.append(f"    ☐ {opt}\n")
+        if len(option_list) > 5:
+            lines.append(f"    ... and {len(option_list) - 5} more items\n")
+    else:
+        lines.append("    ☐ Item 1\n")
+    return lines
+
+def render_numeric_param(display_name, spec, options):
+    """ASCII preview lines for a Numeric Input parameter"""
+    if spec:
+        return [f"[#️⃣] {display_name}: _____________ (Spec: {spec})\n"]
+    return [f"[#️⃣] {display_name}: _____________\n"]
+
+def render_text_param(display_name, spec, options):
+    """ASCII preview lines for a Text Input parameter"""
+    return [f"[✏️] {display_name}: _____________________________\n"]
+
+def render_remarks_param(display_name, spec, options):
+    """ASCII preview lines for a Remarks parameter"""
+    return [f"[📝] {display_name}:\n", ASCII_REMARKS_BOX]
+
+PARAM_RENDERERS = {
+    "Image Upload": render_image_param,
+    "Toggle": render_toggle_param,
+    "Dropdown": render_dropdown_param,
+    "Checklist": render_checklist_param,
+    "Numeric Input": render_numeric_param,
+    "Text Input": render_text_param,
+    "Remarks": render_remarks_param
+}
+
+@app.route("/preview/<request_id>", methods=["GET"])
+def preview_page(request_id):
+    """preview with better formatting and metadata"""
+    try:
+        # Get request details from Cosmos DB
+        req = cosmos_db.get_request_by_id(str(request_id))
+        
+        # The parameter count is recorded on the request once its template and parameters are
+        # all written, so only complete requests have cached pages (keyed by that count)
+        parameter_count = req.get("parameter_count") if req else None
+        if parameter_count:
+            cached_html = azure_cache.get_cached_preview(request_id, parameter_count)
+            if cached_html:
+                return cached_html
+        
+        # Get template JSON and parameters (projected to the fields the preview uses) from Cosmos DB
+        template_future = read_executor.submit(cosmos_db.get_template_by_request_id, str(request_id))
+        params_future = read_executor.submit(cosmos_db.get_parameter_list_by_request_id, str(request_id))
+        
+        if req:
+            request_details = (req["doc_type"], req["product_name"], req["supplier_name"])
+        else:
+            request_details = None
+        
+        template_data = template_future.result()
+        param_items = params_future.result()
+        
+        # Convert to tuple format for existing code
+        parameters = [
+            (
+                item["Parameter"],
+                item["Type"],
+                item["Spec"],
+                item["DropdownOptions"],
+                item["IncludeRemarks"],
+                item["Section"],
+                item["ClauseReference"]
+            ) for item in param_items
+        ]
+        
+        if not template_data:
+            return f"""
+            <html>
+            <head><title>Not Found</title></head>
+            <body>
+                <h1>Template not found</h1>
+                <p>No template exists for request ID {request_id}</p>
+                <a href="/history">View History</a>
+            </body>
+            </html>
+            """, 404
+            
+        json_template = template_data
+        
+        # Generate ASCII preview with sections
+        preview_parts = [ASCII_BOX_TOP]
+        
+        if request_details:
+            header = f"{request_details[1]} {request_details[0]}"
+        else:
+            header = "QC Template"
+        
+        preview_parts.append(f"║{header.center(70)}║\n")
+        
+        if request_details and request_details[2]:
+            supplier = f"Supplier: {request_details[2]}"
+            preview_parts.append(f"║{supplier.center(70)}║\n")
+            
+        preview_parts.append(ASCII_BOX_BOTTOM)
+        
+        # Group parameters by section
+        sections = {}
+        for param in parameters:
+            param_name, param_type, spec, options, include_remarks, section, clause_ref = param
+            section = section or "General Parameters"
+            if section not in sections:
+                sections[section] = []
+            sections[section].append(param)
+        
+        # Add parameters organized by sections
+        for section_name, section_params in sections.items():
+            preview_parts.append(f"\n🔹 {section_name.upper()}\n")
+            preview_parts.append(ASCII_SECTION_RULE)
+            
+            for param in section_params:
+                param_name, param_type, spec, options, include_remarks, section, clause_ref = param
+                
+                # Add clause reference if available
+                display_name = param_name
+                if clause_ref:
+                    display_name += f" ({clause_ref})"
+                
+                render_param = PARAM_RENDERERS.get(param_type)
+                if render_param:
+                    preview_parts.extend(render_param(display_name, spec, options))
+                
+                if include_remarks == "Yes" and param_type != "Remarks":
+                    preview_parts.append(f"    └─ Additional Remarks: _______________________\n")
+                
+                preview_parts.append("\n")
+        
+        # Add final assessment
+        preview_parts.append(ASCII_FINAL_ASSESSMENT)
+        ascii_preview = "".join(preview_parts)
+        
+        # statistics
+        total_params = len(parameters)
+        param_types = {}
+        sections_count = len(sections)
+        regulatory_refs = sum(1 for param in parameters if param[6])  # clause references
+        
+        for param in parameters:
+            param_type = param[1]
+            param_types[param_type] = param_types.get(param_type, 0) + 1
+        
+        quality_color = '#28a745' if total_params >= 15 else '#ffc107' if total_params >= 10 else '#dc3545'
+        html = PREVIEW_HTML_TEMPLATE.format(
+            request_id=request_id,
+            quality_color=quality_color,
+            ascii_preview=ascii_preview,
+            template_json=json_dumps_pretty(json_template)
+        )
+        if parameter_count and total_params == parameter_count:
+            azure_cache.cache_preview(request_id, parameter_count, html)
         return html
         
     except Exception as e:
@@ -2389,22 +2613,19 @@ def async_file_upload():
         # Create QC request
         request_id = cosmos_db.create_qc_request(doc_type, product_name, supplier_name)
         
-        # Upload to blob storage
-        blob_connection = get_blob_connection()
-        blob_client = BlobServiceClient.from_connection_string(blob_connection)
-        
         # Generate unique blob name
-        file_ext = Path(file.filename).suffix
-        blob_name = f"{request_id}_{uuid.uuid4()}{file_ext}"
+        file_ext = os.path.splitext(file.filename)[1]
+        blob_name = f"{request_id}_{uuid.uuid4().hex}{file_ext}"
         
-        # Upload file
-        blob_client_instance = blob_client.get_blob_client(
+        # Upload file to blob storage
+        blob_client_instance = get_blob_service().get_blob_client(
             container="uploads", 
             blob=blob_name
         )
         
-        file.seek(0)
-        blob_client_instance.upload_blob(file.read(), overwrite=True)
+        # Stream the spooled upload in blocks instead of reading it into memory
+        file.stream.seek(0)
+        blob_client_instance.upload_blob(file.stream, overwrite=True, max_concurrency=4)
         blob_url = blob_client_instance.url
         
         # Trigger background processing
@@ -2437,17 +2658,11 @@ def check_upload_status(request_id):
     """Check status of async file processing"""
     try:
         # Get request from Cosmos DB
-        query = "SELECT * FROM c WHERE c.id = @request_id"
-        items = list(cosmos_db.qc_requests.query_items(
-            query=query,
-            parameters=[{"name": "@request_id", "value": request_id}]
-        ))
+        request_doc = cosmos_db.get_request_by_id(request_id)
         
-        if not items:
+        if not request_doc:
             return jsonify({"error": "Request not found"}), 404
         
-        request_doc = items[0]
-        
         # Check processing status
         processing_status = request_doc.get("processing_status", "queued")
         processing_metadata = request_doc.get("processing_metadata", {})
@@ -2467,7 +2682,7 @@ def check_upload_status(request_id):
             response["message"] = "Document processed successfully"
             
             # Check if parameters were generated
-            param_count = len(cosmos_db.get_parameters_by_request_id(request_id))
+            param_count = cosmos_db.get_parameter_count(request_id)
             response["parameters_generated"] = param_count
             
         elif processing_status == "error":
@@ -2486,7 +2701,6 @@ def trigger_background_processing(blob_url, container_name, blob_name, request_i
     """Trigger background processing job with Event Grid notifications"""
     try:
         # Extract metadata for event
-        from pathlib import Path
         filename = Path(blob_name).name
         
         # Send Event Grid event for document upload
@@ -2503,14 +2717,9 @@ def trigger_background_processing(blob_url, container_name, blob_name, request_i
         )
         
         # Update request status in Cosmos DB
-        query = "SELECT * FROM c WHERE c.id = @request_id"
-        items = list(cosmos_db.qc_requests.query_items(
-            query=query,
-            parameters=[{"name": "@request_id", "value": request_id}]
-        ))
+        request_doc = cosmos_db.get_request_by_id(request_id)
         
-        if items:
-            request_doc = items[0]
+        if request_doc:
             request_doc["processing_status"] = "processing"
             request_doc["blob_url"] = blob_url
             request_doc["blob_name"] = blob_name
@@ -2535,8 +2744,6 @@ def trigger_background_processing(blob_url, container_name, blob_name, request_i
 def get_audit_trail():
     """Get audit trail"""
     try:
-        from audit_logger import audit_logger
-        
         entity_type = request.args.get("entity_type")
         entity_id = request.args.get("entity_id")
         tenant_id = request.args.get("tenant_id", "default")
@@ -2557,8 +2764,6 @@ def get_audit_trail():
 def get_user_audit(user_id):
     """Get user audit activity"""
     try:
-        from audit_logger import audit_logger
-        
         tenant_id = request.args.get("tenant_id", "default")
         days = int(request.args.get("days", 30))
         
@@ -2604,6 +2809,28 @@ def trigger_manual_job():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
+def probe_cosmos_db():
+    """Health probe: read the qc_requests container properties"""
+    cosmos_db.qc_requests.read()
+    return "healthy"
+
+def probe_redis_cache():
+    """Health probe: ping Redis"""
+    azure_cache.redis_client.ping()
+    return "healthy"
+
+def probe_key_vault():
+    """Health probe: make sure secrets resolve"""
+    if azure_secrets.get_secret("openai-key"):
+        return "healthy"
+    return "unhealthy: no secrets"
+
+HEALTH_PROBES = {
+    "cosmos_db": probe_cosmos_db,
+    "redis_cache": probe_redis_cache,
+    "key_vault": probe_key_vault
+}
+
 @app.route("/health", methods=["GET"])
 def health_check():
     """Health check endpoint for Container Apps"""
@@ -2616,37 +2843,17 @@ def health_check():
             "services": {}
         }
         
-        # Test Azure services
-        try:
-            # Test Cosmos DB
-            from cosmos_db_utils import enhanced_cosmos_db
-            test_requests = enhanced_cosmos_db.get_all_requests()
-            health_status["services"]["cosmos_db"] = "healthy"
-        except Exception as e:
-            health_status["services"]["cosmos_db"] = f"unhealthy: {str(e)}"
-            health_status["status"] = "degraded"
-        
-        try:
-            # Test Redis Cache
-            from azure_cache_utils import azure_cache
-            azure_cache.redis_client.ping()
-            health_status["services"]["redis_cache"] = "healthy"
-        except Exception as e:
-            health_status["services"]["redis_cache"] = f"unhealthy: {str(e)}"
-            health_status["status"] = "degraded"
-        
-        try:
-            # Test Key Vault
-            from azure_secrets import azure_secrets
-            test_secret = azure_secrets.get_secret("openai-key")
-            if test_secret:
-                health_status["services"]["key_vault"] = "healthy"
-            else:
-                health_status["services"]["key_vault"] = "unhealthy: no secrets"
+        # Probe Azure services side by side; total latency is that of the slowest probe
+        probe_futures = {name: read_executor.submit(probe) for name, probe in HEALTH_PROBES.items()}
+        for name, probe_future in probe_futures.items():
+            try:
+                service_status = probe_future.result()
+            except Exception as e:
+                service_status = f"unhealthy: {str(e)}"
+            
+            health_status["services"][name] = service_status
+            if service_status != "healthy":
                 health_status["status"] = "degraded"
-        except Exception as e:
-            health_status["services"]["key_vault"] = f"unhealthy: {str(e)}"
-            health_status["status"] = "degraded"
         
         # Return appropriate HTTP status
         if health_status["status"] == "healthy":
@@ -2823,8 +3030,7 @@ def analytics_dashboard():
     
     try:
         # Get dashboard data
-        dashboard_data = analytics_engine.get_dashboard_data(tenant_id)
-        performance_metrics = analytics_engine.get_performance_metrics(tenant_id)
+        dashboard_data, performance_metrics = analytics_engine.get_dashboard_overview(tenant_id)
         
         return jsonify({
             "success": True,
@@ -2835,6 +3041,15 @@ def analytics_dashboard():
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+# Same on every response, so built once rather than per request
+SECURITY_HEADERS = (
+    ('X-Content-Type-Options', 'nosniff'),
+    ('X-Frame-Options', 'DENY'),
+    ('X-XSS-Protection', '1; mode=block'),
+    ('Strict-Transport-Security', 'max-age=31536000; includeSubDomains')
+)
+
 @app.after_request
 def after_request(response):
     """Track request completion and add security headers"""
@@ -2846,17 +3061,11 @@ def after_request(response):
             len(response.get_data())
         )
     
-    # Add security headers
-    response.headers['X-Content-Type-Options'] = 'nosniff'
-    response.headers['X-Frame-Options'] = 'DENY'
-    response.headers['X-XSS-Protection'] = '1; mode=block'
-    response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
-    
-    # Add rate limit headers
-    rate_limit_headers = rate_limiter.get_rate_limit_headers()
-    for key, value in rate_limit_headers.items():
-        response.headers[key] = value
-    from flask import request
+    # Add security and rate limit headers
+    headers = response.headers
+    for key, value in SECURITY_HEADERS:
+        headers[key] = value
+    headers.update(rate_limiter.get_rate_limit_headers())
     azure_monitoring.track_request(
         endpoint=request.endpoint or request.path,
         method=request.method, 
@@ -2871,6 +3080,7 @@ def performance_dashboard():
         return jsonify({
             "success": True,
             "performance_stats": stats,
+            "analytics_errors": analytics_engine.get_error_counts(),
             "timestamp": datetime.now().isoformat()
         })
     except Exception as e:
@@ -2888,9 +3098,10 @@ def rate_limits_info():
 @app.route("/pdf/template/<request_id>", methods=["GET"])
 def generate_template_pdf(request_id):
     """Generate PDF report for QC template"""
+    if pdf_generator is None:
+        return jsonify({"error": "PDF generation is not available"}), 503
+    
     try:
-        from pdf_generator import pdf_generator
-        
         pdf_bytes = pdf_generator.generate_qc_template_report(request_id)
         
         if pdf_bytes:
@@ -2910,9 +3121,10 @@ def generate_template_pdf(request_id):
 @app.route("/pdf/analytics", methods=["GET"])
 def generate_analytics_pdf():
     """Generate analytics PDF report"""
+    if pdf_generator is None:
+        return jsonify({"error": "PDF generation is not available"}), 503
+    
     try:
-        from pdf_generator import pdf_generator
-        
         tenant_id = request.args.get("tenant_id", "default")
         days = int(request.args.get("days", 30))
         
@@ -2935,24 +3147,23 @@ def generate_analytics_pdf():
 def setup_containers():
     """Setup missing containers"""
     try:
-        # Import here to avoid circular imports
-        from cosmos_db_utils import enhanced_cosmos_db
-        
-        database = enhanced_cosmos_db.database
-        
-        containers_to_create = [
-            "workflow_approvals",
-            "tenants", 
-            "analytics_events",
-            "published_templates"
-        ]
+        database = cosmos_db.database
+        
+        containers_to_create = {
+            "workflow_approvals": "/id",
+            "tenants": "/id", 
+            # Partitioned by tenant so buffered events can be written as batches
+            "analytics_events": "/tenant_id",
+            "analytics_daily": "/tenant_id",
+            "published_templates": "/id"
+        }
         
         created = []
-        for container_name in containers_to_create:
+        for container_name, partition_path in containers_to_create.items():
             try:
                 database.create_container(
                     id=container_name,
-                    partition_key={"paths": ["/id"], "kind": "Hash"}
+                    partition_key={"paths": [partition_path], "kind": "Hash"}
                 )
                 created.append(container_name)
                 print(f"✅ Created container: {container_name}")
@@ -2962,9 +3173,18 @@ def setup_containers():
                 else:
                     print(f"ℹ️ Container {container_name} already exists")
         
+        # Narrow indexing on the existing qc_requests container to cut write RU
+        try:
+            cosmos_db.apply_qc_requests_indexing_policy()
+            indexing_updated = True
+        except Exception as e:
+            print(f"⚠️ Error updating qc_requests indexing policy: {e}")
+            indexing_updated = False
+        
         return jsonify({
             "success": True,
             "containers_created": created,
+            "qc_requests_indexing_updated": indexing_updated,
             "message": f"Setup complete. Created {len(created)} new containers"
         })
         
@@ -2974,5 +3194,3 @@ def setup_containers():
 if __name__ == "__main__":
     print("🚀 Starting Swift Check API v2.0...")
     app.run(host="127.0.0.1", port=5000, debug=True)
-# Import working Event Grid handler
-from event_grid_integration import working_event_handler
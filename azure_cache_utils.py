@@ -27,26 +27,29 @@ class AzureRedisCacheManager:
         except Exception as e:
             print(f"❌ Redis connection failed: {e}")
     
-    def get_cache_key(self, user_message, doc_type, product_name, supplier_name):
+    def get_cache_key(self, user_message, doc_type, product_name, supplier_name, is_digitization=False, existing_parameters=None):
         """Generate cache key for LLM request"""
-        # Create deterministic key from request parameters
+        # Normalize so whitespace/case variants of the same request share an entry
         cache_data = {
-            "user_message": user_message,
-            "doc_type": doc_type,
-            "product_name": product_name,
-            "supplier_name": supplier_name
+            "user_message": " ".join((user_message or "").split()),
+            "doc_type": (doc_type or "").strip().lower(),
+            "product_name": (product_name or "").strip().lower(),
+            "supplier_name": (supplier_name or "").strip().lower(),
+            "is_digitization": bool(is_digitization),
+            # Edits of different templates must not share a change list
+            "existing_parameters": existing_parameters or None
         }
         
         # Create hash of the request
-        cache_string = json.dumps(cache_data, sort_keys=True)
-        cache_key = hashlib.sha256(cache_string.encode()).hexdigest()
+        cache_string = json.dumps(cache_data, sort_keys=True, default=str)
+        cache_key = hashlib.blake2b(cache_string.encode(), digest_size=16).hexdigest()
         
         return f"swiftcheck:llm:{cache_key}"
     
-    def get_cached_response(self, user_message, doc_type, product_name, supplier_name):
+    def get_cached_response(self, user_message, doc_type, product_name, supplier_name, is_digitization=False, existing_parameters=None):
         """Get cached LLM response if available"""
         try:
-            cache_key = self.get_cache_key(user_message, doc_type, product_name, supplier_name)
+            cache_key = self.get_cache_key(user_message, doc_type, product_name, supplier_name, is_digitization, existing_parameters)
             cached_data = self.redis_client.get(cache_key)
             
             if cached_data:
@@ -61,10 +64,10 @@ class AzureRedisCacheManager:
             print(f"❌ Cache retrieval error: {e}")
             return None
     
-    def cache_response(self, user_message, doc_type, product_name, supplier_name, llm_response):
+    def cache_response(self, user_message, doc_type, product_name, supplier_name, llm_response, is_digitization=False, existing_parameters=None):
         """Cache LLM response"""
         try:
-            cache_key = self.get_cache_key(user_message, doc_type, product_name, supplier_name)
+            cache_key = self.get_cache_key(user_message, doc_type, product_name, supplier_name, is_digitization, existing_parameters)
             
             cache_data = {
                 "response": llm_response,
@@ -85,6 +88,71 @@ class AzureRedisCacheManager:
         except Exception as e:
             print(f"❌ Cache storage error: {e}")
     
+    def get_ocr_cache_key(self, file_data, file_ext):
+        """Generate cache key for extracted document text from the file contents"""
+        digest = hashlib.blake2b(file_data, digest_size=16).hexdigest()
+        return f"swiftcheck:ocr:{file_ext}:{digest}"
+    
+    def get_cached_ocr(self, file_data, file_ext):
+        """Get cached extracted text for an uploaded document if available"""
+        try:
+            cached_text = self.redis_client.get(self.get_ocr_cache_key(file_data, file_ext))
+            if cached_text:
+                print(f"✅ OCR cache HIT ({len(cached_text)} characters)")
+            return cached_text
+        except Exception as e:
+            print(f"❌ OCR cache retrieval error: {e}")
+            return None
+    
+    def cache_ocr(self, file_data, file_ext, extracted_text, ttl=604800):
+        """Cache extracted text for an uploaded document"""
+        try:
+            # Cache for 7 days by default; the same reference documents are re-uploaded across edits
+            self.redis_client.setex(self.get_ocr_cache_key(file_data, file_ext), ttl, extracted_text)
+        except Exception as e:
+            print(f"❌ OCR cache storage error: {e}")
+    
+    def get_template_cache_key(self, request_id):
+        """Generate cache key for a serialized JSON template"""
+        return f"swiftcheck:template:{request_id}"
+    
+    def get_cached_template(self, request_id):
+        """Get the cached serialized JSON template for a request if available"""
+        try:
+            return self.redis_client.get(self.get_template_cache_key(request_id))
+        except Exception as e:
+            print(f"❌ Template cache retrieval error: {e}")
+            return None
+    
+    def cache_template(self, request_id, template_body):
+        """Cache the serialized JSON template for a request"""
+        try:
+            # Cache for 1 hour; templates are never rewritten under an existing request id
+            self.redis_client.setex(self.get_template_cache_key(request_id), 3600, template_body)
+        except Exception as e:
+            print(f"❌ Template cache storage error: {e}")
+    
+    def get_preview_cache_key(self, request_id, parameter_count):
+        """Generate cache key for a rendered template preview page"""
+        # Versioned by the parameter count recorded on the request once all its writes land
+        return f"swiftcheck:preview:{request_id}:{parameter_count}"
+    
+    def get_cached_preview(self, request_id, parameter_count):
+        """Get cached preview HTML for a request if available"""
+        try:
+            return self.redis_client.get(self.get_preview_cache_key(request_id, parameter_count))
+        except Exception as e:
+            print(f"❌ Preview cache retrieval error: {e}")
+            return None
+    
+    def cache_preview(self, request_id, parameter_count, preview_html):
+        """Cache preview HTML for a request"""
+        try:
+            # Cache for 1 hour; a request's template and parameters do not change once saved
+            self.redis_client.setex(self.get_preview_cache_key(request_id, parameter_count), 3600, preview_html)
+        except Exception as e:
+            print(f"❌ Preview cache storage error: {e}")
+    
     def clear_cache(self, pattern="swiftcheck:llm:*"):
         """Clear cache by pattern"""
         try:
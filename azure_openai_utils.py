@@ -3,6 +3,35 @@ import time
 from azure_secrets import get_openai_config
 from azure_cache_utils import azure_cache
 
+# Kept identical across calls; product-specific text is appended after it
+QC_SYSTEM_INSTRUCTIONS = '''
+You are the Swift Check AI assistant. Create comprehensive QC parameters for the product given below.
+
+Generate MINIMUM 15+ parameters covering:
+1. Physical Parameters (appearance, weight, dimensions)
+2. Safety Parameters (foreign objects, microbiological)
+3. Sensory Parameters (taste, aroma, texture)
+4. Packaging Parameters (integrity, labeling)
+5. Process Control (temperature, time)
+6. Compliance (regulatory requirements)
+
+Output as JSON array with this format:
+[
+  {
+    "action": "add",
+    "Parameter": "Product Appearance",
+    "Type": "Image Upload",
+    "Spec": "Visual inspection with photo",
+    "DropdownOptions": "",
+    "IncludeRemarks": "Yes",
+    "Section": "Physical Parameters",
+    "ClauseReference": "Dubai Municipality Section 4.1"
+  }
+]
+
+Valid Types: Image Upload, Toggle, Dropdown, Checklist, Numeric Input, Text Input, Remarks
+'''
+
 class AzureOpenAIManager:
     def __init__(self):
         config = get_openai_config()
@@ -24,7 +53,7 @@ class AzureOpenAIManager:
         
         # Check cache first
         cached_response = azure_cache.get_cached_response(
-            user_message, doc_type, product_name, supplier_name
+            user_message, doc_type, product_name, supplier_name, is_digitization, existing_parameters
         )
         
         if cached_response:
@@ -43,36 +72,8 @@ class AzureOpenAIManager:
             print(f"?? RAG context error: {e}")
             formatted_context = f"Generate comprehensive QC parameters for {product_name}."
         
-        # Build system prompt
-        system_prompt = f'''
-You are the Swift Check AI assistant. Create comprehensive QC parameters for {product_name}.
-
-Context: {formatted_context}
-
-Generate MINIMUM 15+ parameters covering:
-1. Physical Parameters (appearance, weight, dimensions)
-2. Safety Parameters (foreign objects, microbiological)
-3. Sensory Parameters (taste, aroma, texture)
-4. Packaging Parameters (integrity, labeling)
-5. Process Control (temperature, time)
-6. Compliance (regulatory requirements)
-
-Output as JSON array with this format:
-[
-  {{
-    "action": "add",
-    "Parameter": "Product Appearance",
-    "Type": "Image Upload",
-    "Spec": "Visual inspection with photo",
-    "DropdownOptions": "",
-    "IncludeRemarks": "Yes",
-    "Section": "Physical Parameters",
-    "ClauseReference": "Dubai Municipality Section 4.1"
-  }}
-]
-
-Valid Types: Image Upload, Toggle, Dropdown, Checklist, Numeric Input, Text Input, Remarks
-'''
+        # Static instructions first, then the product name and RAG context
+        system_prompt = f"{QC_SYSTEM_INSTRUCTIONS}\nProduct: {product_name}\n\nContext: {formatted_context}\n"
         
         messages = [
             {"role": "system", "content": system_prompt},
@@ -96,7 +97,7 @@ Valid Types: Image Upload, Toggle, Dropdown, Checklist, Numeric Input, Text Inpu
             
             # Cache the response
             azure_cache.cache_response(
-                user_message, doc_type, product_name, supplier_name, result
+                user_message, doc_type, product_name, supplier_name, result, is_digitization, existing_parameters
             )
             
             # Track monitoring
@@ -147,14 +147,9 @@ class DocumentProcessorJob:
         """Update QC request status in Cosmos DB"""
         try:
             # Get existing request
-            query = "SELECT * FROM c WHERE c.id = @request_id"
-            items = list(enhanced_cosmos_db.qc_requests.query_items(
-                query=query,
-                parameters=[{"name": "@request_id", "value": request_id}]
-            ))
-            
-            if items:
-                request_doc = items[0]
+            request_doc = enhanced_cosmos_db.get_request_by_id(request_id)
+            
+            if request_doc:
                 request_doc["processing_status"] = status
                 request_doc["processing_metadata"] = metadata
                 request_doc["updated_at"] = datetime.now().isoformat()
@@ -1,9 +1,31 @@
-from azure.cosmos import CosmosClient, exceptions
+from azure.cosmos import CosmosClient, PartitionKey, exceptions
 from azure_secrets import get_cosmos_connection
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import uuid
 import json
 
+# Stored parameter fields projected straight into the shape the app works with
+PARAMETER_LIST_QUERY = (
+    "SELECT c.parameter_name AS Parameter, c.type AS Type, c.spec AS Spec, "
+    "c.dropdown_options AS DropdownOptions, c.include_remarks AS IncludeRemarks, "
+    "c.section AS Section, c.clause_reference AS ClauseReference "
+    "FROM c WHERE c.request_id = @request_id"
+)
+
+# qc_requests is read by id and listed by created_at; leave the large free-text fields unindexed
+QC_REQUESTS_INDEXING_POLICY = {
+    "indexingMode": "consistent",
+    "includedPaths": [
+        {"path": "/id/?"},
+        {"path": "/created_at/?"},
+        {"path": "/processing_status/?"}
+    ],
+    "excludedPaths": [
+        {"path": "/*"}
+    ]
+}
+
 class EnhancedCosmosDBManager:
     def __init__(self):
         connection_string = get_cosmos_connection()
@@ -15,6 +37,9 @@ class EnhancedCosmosDBManager:
         self.parameters = self.database.get_container_client("parameters")
         self.templates = self.database.get_container_client("json_templates")
         self.responses = self.database.get_container_client("llm_responses")
+        
+        # Parameters live one per partition, so they cannot share a batch; write them concurrently instead
+        self.write_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="cosmos-write")
     
     def create_qc_request(self, doc_type, product_name, supplier_name, user_message=None):
         """Create new QC request"""
@@ -59,22 +84,29 @@ class EnhancedCosmosDBManager:
     def save_parameters(self, request_id, parameters_list):
         """Save parameters for a request"""
         try:
+            docs = []
             for i, param in enumerate(parameters_list):
-                doc = {
+                dropdown_options = param.get("DropdownOptions", "")
+                if isinstance(dropdown_options, list):
+                    dropdown_options = ", ".join(dropdown_options)
+                
+                docs.append({
                     "id": f"{request_id}-param-{i}",
                     "request_id": request_id,
                     "parameter_name": param.get("Parameter", ""),
                     "type": param.get("Type", ""),
                     "spec": param.get("Spec", ""),
-                    "dropdown_options": param.get("DropdownOptions", ""),
+                    "dropdown_options": dropdown_options,
                     "checklist_options": param.get("ChecklistOptions", ""),
                     "include_remarks": param.get("IncludeRemarks", "No"),
                     "section": param.get("Section", "General"),
                     "clause_reference": param.get("ClauseReference", ""),
                     "created_at": datetime.now().isoformat()
-                }
-                
-                self.parameters.create_item(doc)
+                })
+            
+            # Consume results so the first failed write is raised here
+            for _ in self.write_pool.map(self.parameters.create_item, docs):
+                pass
             
             print(f"✅ Saved {len(parameters_list)} parameters for request: {request_id}")
         except exceptions.CosmosHttpResponseError as e:
@@ -97,9 +129,49 @@ class EnhancedCosmosDBManager:
             print(f"❌ Error saving JSON template: {e}")
             raise
     
+    def set_parameter_count(self, request_id, parameter_count):
+        """Record on a QC request how many parameters were saved for it"""
+        try:
+            self.qc_requests.patch_item(
+                item=request_id,
+                partition_key=request_id,
+                patch_operations=[{"op": "set", "path": "/parameter_count", "value": parameter_count}]
+            )
+        except exceptions.CosmosHttpResponseError as e:
+            print(f"❌ Error recording parameter count: {e}")
+    
+    def apply_qc_requests_indexing_policy(self):
+        """Replace the qc_requests indexing policy with QC_REQUESTS_INDEXING_POLICY"""
+        self.database.replace_container(
+            self.qc_requests,
+            partition_key=PartitionKey(path="/id"),
+            indexing_policy=QC_REQUESTS_INDEXING_POLICY
+        )
+        print("✅ Updated qc_requests indexing policy")
+    
+    def get_request_by_id(self, request_id):
+        """Get QC request by ID with a point read (qc_requests is partitioned on /id)"""
+        try:
+            return self.qc_requests.read_item(item=request_id, partition_key=request_id)
+        except exceptions.CosmosResourceNotFoundError:
+            return None
+    
     def get_template_by_request_id(self, request_id):
         """Get template by request ID"""
         try:
+            # Templates saved here are keyed "<request_id>-template" in an /id-partitioned container
+            return self.templates.read_item(
+                item=f"{request_id}-template",
+                partition_key=f"{request_id}-template"
+            )["template_json"]
+        except exceptions.CosmosResourceNotFoundError:
+            pass
+        except exceptions.CosmosHttpResponseError as e:
+            print(f"❌ Error getting template: {e}")
+            return None
+        
+        try:
+            # Fall back to a query for templates stored under any other id
             query = "SELECT * FROM c WHERE c.request_id = @request_id"
             items = list(self.templates.query_items(
                 query=query,
@@ -139,5 +211,42 @@ class EnhancedCosmosDBManager:
             print(f"❌ Error getting parameters: {e}")
             return []
 
+    def get_parameter_list_by_request_id(self, request_id):
+        """Get parameters by request ID in the Parameter/Type/Spec/... shape used for templates"""
+        try:
+            return list(self.parameters.query_items(
+                query=PARAMETER_LIST_QUERY,
+                parameters=[{"name": "@request_id", "value": request_id}],
+                enable_cross_partition_query=True
+            ))
+        except exceptions.CosmosHttpResponseError as e:
+            print(f"❌ Error getting parameters: {e}")
+            return []
+
+    def get_parameter_count(self, request_id):
+        """Count saved parameters for a request without fetching the documents"""
+        try:
+            counts = list(self.parameters.query_items(
+                query="SELECT VALUE COUNT(1) FROM c WHERE c.request_id = @request_id",
+                parameters=[{"name": "@request_id", "value": request_id}],
+                enable_cross_partition_query=True
+            ))
+            return counts[0] if counts else 0
+        except exceptions.CosmosHttpResponseError as e:
+            print(f"❌ Error counting parameters: {e}")
+            return 0
+    
+    def get_parameter_counts(self):
+        """Get the number of saved parameters for every request in one grouped query"""
+        try:
+            items = self.parameters.query_items(
+                query="SELECT c.request_id, COUNT(1) AS n FROM c GROUP BY c.request_id",
+                enable_cross_partition_query=True
+            )
+            return {item["request_id"]: item["n"] for item in items}
+        except exceptions.CosmosHttpResponseError as e:
+            print(f"❌ Error counting parameters: {e}")
+            return {}
+
 # Global instance
-enhanced_cosmos_db = EnhancedCosmosDBManager()
\ No newline at end of file
+enhanced_cosmos_db = EnhancedCosmosDBManager()
@@ -44,17 +44,11 @@ class PDFReportGenerator:
                 return None
             
             # Get request details
-            req_query = "SELECT * FROM c WHERE c.id = @request_id"
-            req_items = list(enhanced_cosmos_db.qc_requests.query_items(
-                query=req_query,
-                parameters=[{"name": "@request_id", "value": request_id}]
-            ))
+            request_details = enhanced_cosmos_db.get_request_by_id(request_id)
             
-            if not req_items:
+            if not request_details:
                 return None
             
-            request_details = req_items[0]
-            
             # Get parameters
             param_query = "SELECT * FROM c WHERE c.request_id = @request_id"
             param_items = list(enhanced_cosmos_db.parameters.query_items(
@@ -13,18 +13,22 @@ class PerformanceMonitor:
         self.system_metrics = {}
         self.redis_client = azure_cache.redis_client
         
+        # Reused for per-request memory readings instead of re-resolving the process each time
+        self.process = psutil.Process()
+        
         # Start background monitoring
         self.monitoring_thread = threading.Thread(target=self.monitor_system, daemon=True)
         self.monitoring_thread.start()
         
     def track_request_start(self, endpoint, method):
         """Track request start time"""
-        request_id = f"{endpoint}_{method}_{time.time()}"
+        start_time = time.time()
+        request_id = f"{endpoint}_{method}_{start_time}"
         self.request_metrics[request_id] = {
             "endpoint": endpoint,
             "method": method,
-            "start_time": time.time(),
-            "memory_start": psutil.Process().memory_info().rss
+            "start_time": start_time,
+            "memory_start": self.process.memory_info().rss
         }
         return request_id
     
@@ -36,7 +40,7 @@ class PerformanceMonitor:
         metrics = self.request_metrics[request_id]
         end_time = time.time()
         duration = end_time - metrics["start_time"]
-        memory_end = psutil.Process().memory_info().rss
+        memory_end = self.process.memory_info().rss
         memory_used = memory_end - metrics["memory_start"]
         
         # Create performance record
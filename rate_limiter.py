@@ -40,30 +40,18 @@ class RateLimiter:
             # Redis key for this client and endpoint
             redis_key = f"rate_limit:{client_id}:{endpoint}"
             
-            # Get current request count
-            current_requests = self.redis_client.get(redis_key)
+            # Open the window on first hit, count this request and read the window TTL
+            # atomically in one round trip; INCR keeps the expiry set by SET EX
+            pipeline = self.redis_client.pipeline(transaction=True)
+            pipeline.set(redis_key, 0, ex=window_seconds, nx=True)
+            pipeline.incr(redis_key)
+            pipeline.ttl(redis_key)
+            _, current_requests, ttl = pipeline.execute()
             
-            if current_requests is None:
-                # First request in this window
-                self.redis_client.setex(redis_key, window_seconds, 1)
-                remaining = max_requests - 1
-                reset_time = int(time.time()) + window_seconds
-                
-                g.rate_limit_info = {
-                    "limit": max_requests,
-                    "remaining": remaining,
-                    "reset": reset_time,
-                    "window": window_seconds
-                }
-                return False
-            
-            current_requests = int(current_requests)
+            reset_time = int(time.time()) + (ttl if ttl > 0 else window_seconds)
             
-            if current_requests >= max_requests:
+            if current_requests > max_requests:
                 # Rate limit exceeded
-                ttl = self.redis_client.ttl(redis_key)
-                reset_time = int(time.time()) + (ttl if ttl > 0 else window_seconds)
-                
                 g.rate_limit_info = {
                     "limit": max_requests,
                     "remaining": 0,
@@ -73,15 +61,9 @@ class RateLimiter:
                 }
                 return True
             
-            # Increment counter
-            self.redis_client.incr(redis_key)
-            remaining = max_requests - (current_requests + 1)
-            ttl = self.redis_client.ttl(redis_key)
-            reset_time = int(time.time()) + (ttl if ttl > 0 else window_seconds)
-            
             g.rate_limit_info = {
                 "limit": max_requests,
-                "remaining": remaining,
+                "remaining": max_requests - current_requests,
                 "reset": reset_time,
                 "window": window_seconds
             }
@@ -0,0 +1,57 @@
+import importlib
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("azure.ai.formrecognizer")
+pytest.importorskip("azure.storage.blob")
+
+
+@pytest.fixture
+def doc_intelligence(monkeypatch):
+    """Import the module against dummy credentials; nothing is called until analysis"""
+    monkeypatch.setenv("AZURE_ENVIRONMENT", "production")
+    monkeypatch.setenv("FORM_RECOGNIZER_ENDPOINT", "https://example.cognitiveservices.azure.com/")
+    monkeypatch.setenv("FORM_RECOGNIZER_KEY", "test-key")
+    monkeypatch.setenv(
+        "BLOB_CONNECTION_STRING",
+        "DefaultEndpointsProtocol=https;AccountName=test;AccountKey=dGVzdA==;EndpointSuffix=core.windows.net"
+    )
+    module = importlib.import_module("azure_document_intelligence")
+    return module.azure_doc_intelligence
+
+
+def make_layout_result():
+    cells = [
+        SimpleNamespace(row_index=0, column_index=0, content="Parameter"),
+        SimpleNamespace(row_index=0, column_index=1, content="Spec"),
+        SimpleNamespace(row_index=1, column_index=0, content="Moisture"),
+        SimpleNamespace(row_index=1, column_index=1, content="< 12%"),
+    ]
+    return SimpleNamespace(
+        pages=[SimpleNamespace(lines=[SimpleNamespace(content="MALABAR PARATHA INSPECTION")])],
+        tables=[SimpleNamespace(row_count=2, column_count=2, cells=cells)],
+        paragraphs=[
+            SimpleNamespace(content="PHYSICAL EVALUATION", bounding_regions=[]),
+            SimpleNamespace(content="Check each pack before loading.", bounding_regions=[]),
+        ],
+    )
+
+
+def test_analyze_document_bytes_extracts_layout(doc_intelligence, monkeypatch):
+    poller = mock.Mock()
+    poller.result.return_value = make_layout_result()
+    doc_client = mock.Mock()
+    doc_client.begin_analyze_document.return_value = poller
+    monkeypatch.setattr(doc_intelligence, "doc_client", doc_client)
+
+    extracted = doc_intelligence.analyze_document_bytes(b"%PDF-1.4")
+
+    doc_client.begin_analyze_document.assert_called_once_with("prebuilt-layout", b"%PDF-1.4")
+    assert "=== PAGE 1 ===" in extracted["text"]
+    assert "MALABAR PARATHA INSPECTION" in extracted["text"]
+    assert "Moisture | < 12%" in extracted["text"]
+    assert extracted["tables"][0]["content"] == [["Parameter", "Spec"], ["Moisture", "< 12%"]]
+    assert [section["title"] for section in extracted["sections"]] == ["PHYSICAL EVALUATION"]
+    assert extracted["metadata"] == {"pages": 1, "tables_count": 1, "paragraphs_count": 2}